@@ -10,10 +10,21 @@ CodeSkulptor source:
 http://www.codeskulptor.org/#user40_wmPIY4na8x_8.py
 """
 
+import time
+
 # Used to increase the timeout, if necessary
 import codeskulptor
 codeskulptor.set_timeout(20)
 
+# NumPy is optional, the array scoring path is only used when present
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# cache of (num_die_sides, length) -> array of all outcome sequences
+_SEQUENCE_ARRAYS = {}
+
 def gen_all_sequences(outcomes, length):
     """
     Iterative function that enumerates the set of all sequences of
@@ -52,6 +63,52 @@ def score(hand):
     return max_score
 
 
+def gen_sequence_array(num_die_sides, length):
+    """
+    Array version of gen_all_sequences for the outcomes 
+    1 to num_die_sides.  Requires NumPy.
+
+    Returns an (M, length) integer array with one row per sequence
+    """
+    
+    key = (num_die_sides, length)
+    if key not in _SEQUENCE_ARRAYS:
+        if length == 0:
+            sequences = numpy.zeros((1, 0), dtype=numpy.int64)
+        else:
+            # every index tuple of a (sides, ..., sides) grid is a sequence
+            sequences = numpy.indices((num_die_sides,) * length)
+            sequences = sequences.reshape(length, -1).T + 1
+        _SEQUENCE_ARRAYS[key] = sequences
+    
+    return _SEQUENCE_ARRAYS[key]
+
+
+def score_array(hands, num_die_sides):
+    """
+    Batch version of score for an (M, num_dice) integer array of 
+    hands with faces in 1 to num_die_sides.  Requires NumPy.
+
+    Returns an array of M integer scores
+    """
+    
+    num_hands = hands.shape[0]
+    # size the bins from the data as well, since held dice may show
+    # faces above num_die_sides just like score allows
+    num_faces = num_die_sides + 1
+    if hands.size > 0:
+        num_faces = max(num_faces, int(hands.max()) + 1)
+    
+    # offset every face by its row so a single bincount gives all
+    # of the face histograms at once
+    offsets = numpy.arange(num_hands).reshape(-1, 1) * num_faces
+    counts = numpy.bincount((hands + offsets).ravel(), 
+                            minlength=num_hands * num_faces)
+    counts = counts.reshape(num_hands, num_faces)
+    
+    return (counts * numpy.arange(num_faces)).max(axis=1)
+
+
 def expected_value(held_dice, num_die_sides, num_free_dice):
     """
     Compute the expected value based on held_dice given that there
@@ -64,6 +121,9 @@ def expected_value(held_dice, num_die_sides, num_free_dice):
     Returns a floating point expected value
     """
     
+    if numpy is not None:
+        return expected_value_array(held_dice, num_die_sides, num_free_dice)
+    
     free_dice_set = gen_all_sequences(range(1, num_die_sides + 1), num_free_dice)
     total_score = 0.0
 
@@ -73,6 +133,100 @@ def expected_value(held_dice, num_die_sides, num_free_dice):
     return total_score / len(free_dice_set)
 
 
+def expected_value_array(held_dice, num_die_sides, num_free_dice):
+    """
+    Same as expected_value but scores all of the free dice outcomes
+    in one batch.  Requires NumPy.
+
+    Returns a floating point expected value
+    """
+    
+    free_dice = gen_sequence_array(num_die_sides, num_free_dice)
+    num_outcomes = free_dice.shape[0]
+    
+    # prepend the held dice to every outcome row
+    held = numpy.tile(numpy.array(held_dice, dtype=numpy.int64).reshape(1, -1), 
+                      (num_outcomes, 1))
+    hands = numpy.hstack((held, free_dice))
+    
+    # scores are integers so the float sum is exact, as in expected_value
+    return float(score_array(hands, num_die_sides).sum()) / num_outcomes
+
+
+def fair_die(num_die_sides):
+    """
+    Face weights for a fair die with num_die_sides, for use with
+    the weighted dice functions below.  Integer weights keep the
+    weighted expected values exact.
+    """
+    
+    return [1] * num_die_sides
+
+
+def gen_count_distribution(die_probs):
+    """
+    Dynamic programming function that builds the distribution of 
+    face counts for independent dice by convolving in one die at
+    a time.  Number of states is polynomial in the number of dice.
+
+    die_probs: list with one per-face probability (or weight) vector
+    for each die, where entry i is for face i + 1
+
+    Returns a dictionary mapping tuples of face counts (entry i counts
+    face i + 1) to their probability (or total weight)
+    """
+    
+    num_faces = max([len(probs) for probs in die_probs] + [0])
+    distribution = {(0,) * num_faces: 1}
+    
+    for probs in die_probs:
+        new_distribution = {}
+        for counts, weight in distribution.items():
+            for face_idx in range(len(probs)):
+                if probs[face_idx] == 0:
+                    continue
+                new_counts = list(counts)
+                new_counts[face_idx] += 1
+                new_counts = tuple(new_counts)
+                new_distribution[new_counts] = (new_distribution.get(new_counts, 0) 
+                                                + weight * probs[face_idx])
+        distribution = new_distribution
+    
+    return distribution
+
+
+def expected_value_weighted(held_dice, die_probs):
+    """
+    Compute the expected value based on held_dice given that the 
+    free dice are rolled with the given face probabilities.
+
+    held_dice: dice that you will hold
+    die_probs: list with one per-face probability (or weight) vector
+    for each free die
+
+    Returns a floating point expected value
+    """
+    
+    distribution = gen_count_distribution(die_probs)
+    num_faces = max([len(probs) for probs in die_probs] + list(held_dice) + [0])
+    held_counts = [held_dice.count(face) for face in range(1, num_faces + 1)]
+    
+    total_score = 0
+    total_weight = 0
+    
+    for counts, weight in distribution.items():
+        hand_score = 0
+        for face_idx in range(num_faces):
+            face_count = held_counts[face_idx]
+            if face_idx < len(counts):
+                face_count += counts[face_idx]
+            hand_score = max(face_count * (face_idx + 1), hand_score)
+        total_score += weight * hand_score
+        total_weight += weight
+    
+    return float(total_score) / total_weight
+
+
 def gen_all_holds(hand):
     """
     Generate all possible choices of dice from hand to hold.
@@ -125,6 +279,35 @@ def strategy(hand, num_die_sides):
     return (max_expect_score, best_hold)
 
 
+def strategy_weighted(hand, face_probs):
+    """
+    Compute the hold that maximizes the expected value when the
+    discarded dice are rolled with the given face probabilities.
+
+    hand: full yahtzee hand
+    face_probs: per-face probability (or weight) vector shared by 
+    every die, entry i is for face i + 1
+
+    Returns a tuple where the first element is the expected score and
+    the second element is a tuple of the dice to hold
+    """
+    
+    set_all_holds = gen_all_holds(hand)
+    
+    max_expect_score = 0.0
+    
+    best_hold = ()
+    
+    for item in set_all_holds:
+        free_probs = [face_probs] * (len(hand) - len(item))
+        expect_score = expected_value_weighted(item, free_probs)
+        if expect_score > max_expect_score:
+            max_expect_score = expect_score
+            best_hold = item
+    
+    return (max_expect_score, best_hold)
+
+
 def run_example():
     """
     Compute the dice to hold and expected score for an example hand
@@ -136,12 +319,61 @@ def run_example():
     print "is to hold", hold, "with expected score", hand_score
     
 
+def run_weighted_example():
+    """
+    Compute the dice to hold with a die loaded towards six, and the
+    expected value of rerolling a large number of fair dice
+    """
+    loaded_die = [0.1, 0.1, 0.1, 0.1, 0.1, 0.5]
+    hand = (2, 2, 2, 1, 6)
+    hand_score, hold = strategy_weighted(hand, loaded_die)
+    print "Best strategy for loaded hand", hand
+    print "is to hold", hold, "with expected score", hand_score
+    
+    num_dice = 20
+    start = time.time()
+    expect_score = expected_value_weighted((), [fair_die(6)] * num_dice)
+    print "Expected score of", num_dice, "fair dice is", expect_score,
+    print "in", time.time() - start, "seconds"
+
+
+def run_score_benchmark(num_die_sides = 6, num_dice = 5, trials = 3):
+    """
+    Compare the throughput of the list and array scoring paths
+    over every hand of num_dice dice
+    """
+    
+    hands = list(gen_all_sequences(range(1, num_die_sides + 1), num_dice))
+    
+    start = time.time()
+    for dummy_trial in range(trials):
+        list_scores = [score(hand) for hand in hands]
+    list_time = (time.time() - start) / trials
+    print "score:", len(hands) / list_time, "hands/sec"
+    
+    if numpy is None:
+        print "score_array: NumPy not available"
+        return
+    
+    hand_array = numpy.array(hands, dtype=numpy.int64)
+    start = time.time()
+    for dummy_trial in range(trials):
+        array_scores = score_array(hand_array, num_die_sides)
+    array_time = (time.time() - start) / trials
+    print "score_array:", len(hands) / array_time, "hands/sec"
+    
+    assert list(array_scores) == list_scores, "score mismatch"
+    print "speedup:", list_time / array_time
+    
+
 def print_set(input_set):
     """ prints the set for debug purposes """
     for item in input_set:
         print item
     
 run_example()
+# run_score_benchmark()
+# run_weighted_example()
 
 #import poc_holds_testsuite
 #poc_holds_testsuite.run_suite(gen_all_holds)
@@ -14,6 +14,18 @@ http://www.codeskulptor.org/#user40_K2M2Do5WmM_9.py
 import simpleplot
 import math
 import random
+import time
+import csv
+import os
+import heapq
+import bisect
+from array import array
+
+# multiprocessing is only needed for parallel sweeps
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
 
 # Used to increase the timeout, if necessary
 import codeskulptor
@@ -23,7 +35,45 @@ import poc_clicker_provided as provided
 
 # Constants
 SIM_TIME = 10000000000.0
+# strategy_best buys an item while its cost is within this ratio
+# of the default cost
+BEST_COST_RATIO = 1.15 ** 124
 
+class HistoryView:
+    """
+    Read-only view of a ClickerState history that does not copy
+    the underlying columns.  Entries are built on access.
+    """
+    
+    def __init__(self, state):
+        self._state = state
+        
+    def __len__(self):
+        return len(self._state._history_times)
+    
+    def __getitem__(self, index):
+        """
+        Return the (time, item, cost of item, total cookies) tuple
+        at index, or a list of them for a slice
+        """
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self)))]
+        return self._state._history_entry(index)
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self._state._history_entry(idx)
+            
+    def __eq__(self, other):
+        return list(self) == list(other)
+    
+    def __ne__(self, other):
+        return not self == other
+    
+    def __str__(self):
+        return str(list(self))
+        
+        
 class ClickerState:
     """
     Simple class to keep track of the game state.
@@ -35,7 +85,13 @@ class ClickerState:
         self._time = 0.0
         self._cps = 1.0
         # history = [time bought, item, item cost, total cookies produced]
-        self._history = [(0.0, None, 0.0, 0.0)]
+        # stored column by column, with items as indices into _item_names
+        self._history_times = array("d", [0.0])
+        self._history_items = array("i", [0])
+        self._history_costs = array("d", [0.0])
+        self._history_totals = array("d", [0.0])
+        self._item_names = [None]
+        self._item_indices = {None: 0}
         
     def __str__(self):
         """
@@ -97,7 +153,37 @@ class ClickerState:
         Should return a copy of any internal data structures,
         so that they will not be modified outside of the class.
         """
-        return list(self._history)
+        return list(self.get_history_view())
+    
+    def get_history_view(self):
+        """
+        Return a read-only HistoryView of the history list
+
+        Unlike get_history this does not copy, so it costs the
+        same no matter how many items have been bought
+        """
+        return HistoryView(self)
+    
+    def _history_entry(self, index):
+        """
+        Return the history tuple stored at index
+        """
+        return (self._history_times[index], 
+                self._item_names[self._history_items[index]],
+                self._history_costs[index], 
+                self._history_totals[index])
+    
+    def _append_history(self, item_name, cost):
+        """
+        Record a purchase made at the current time
+        """
+        if item_name not in self._item_indices:
+            self._item_indices[item_name] = len(self._item_names)
+            self._item_names.append(item_name)
+        self._history_times.append(self._time)
+        self._history_items.append(self._item_indices[item_name])
+        self._history_costs.append(cost)
+        self._history_totals.append(self._total_cookies)
 
     def time_until(self, cookies):
         """
@@ -132,24 +218,271 @@ class ClickerState:
         if self._cookies >= cost:
             self._cookies -= cost
             self._cps += additional_cps
-            self._history.append((self._time, item_name, cost, self._total_cookies))
+            self._append_history(item_name, cost)
+            
+    def buy_run(self, item_name, costs, additional_cps, duration, max_cost):
+        """
+        Buy the given item back to back at each of the successive 
+        costs from the iterator costs, while the cost is below 
+        max_cost and affordable in the time left before duration.
+
+        Performs the same float operations as simulate_clicker does
+        one purchase at a time, so the resulting state is identical,
+        but keeps the state in locals and records the history in
+        one go instead of going through the per-purchase methods.
+
+        Returns the number of costs used, which is the number of 
+        times the cost of the item has to be updated
+        """
+        cookies = self._cookies
+        total_cookies = self._total_cookies
+        now = self._time
+        cps = self._cps
+        ceil = math.ceil
+        
+        times = []
+        bought_costs = []
+        totals = []
+        used = 0
+        
+        for cost in costs:
+            # same affordability test as strategy_cheap
+            if cost >= max_cost or cost > cookies + cps * (duration - now):
+                break
+            
+            # same rounding as time_until
+            if cookies >= cost:
+                time_needed = 0.0
+            else:
+                time_needed = ceil((cost - cookies) / cps)
+            if now + time_needed > duration:
+                break
+            
+            # same updates as wait and buy_item
+            if time_needed > 0.0:
+                now += time_needed
+                cookies += time_needed * cps
+                total_cookies += time_needed * cps
+            if cookies >= cost:
+                cookies -= cost
+                cps += additional_cps
+                times.append(now)
+                bought_costs.append(cost)
+                totals.append(total_cookies)
+            used += 1
+            
+        self._cookies = cookies
+        self._total_cookies = total_cookies
+        self._time = now
+        self._cps = cps
+        self._extend_history(item_name, times, bought_costs, totals)
+        
+        return used
+    
+    def _extend_history(self, item_name, times, costs, totals):
+        """
+        Record several purchases of the same item at once
+        """
+        if times == []:
+            return
+        if item_name not in self._item_indices:
+            self._item_indices[item_name] = len(self._item_names)
+            self._item_names.append(item_name)
+        self._history_times.extend(array("d", times))
+        self._history_items.extend(array("i", [self._item_indices[item_name]] * len(times)))
+        self._history_costs.extend(array("d", costs))
+        self._history_totals.extend(array("d", totals))
    
     
-def simulate_clicker(build_info, duration, strategy):
+class StrategyContext:
     """
-    Function to run a Cookie Clicker game for the given
-    duration with the given strategy.  Returns a ClickerState
-    object corresponding to the final state of the game.
+    Wrapper around a BuildInfo that lives for one simulation and
+    keeps its items indexed by cost and by payback time (cost / cps).
+    The indexes are updated incrementally by update_item, so the 
+    strategies can find their item without scanning every item.
+
+    Supports the same methods as BuildInfo, so it can be passed to
+    strategies in place of one.
+    """
+    
+    def __init__(self, build_info):
+        self._build_info = build_info
+        self._items = build_info.build_items()
+        self._positions = {}
+        for position in range(len(self._items)):
+            self._positions[self._items[position]] = position
+        
+        # heaps of (key, ..., item) with stale entries skipped lazily
+        self._cost_heap = []
+        self._payback_heap = []
+        # all items sorted by (cost, item) for threshold queries,
+        # with their costs alone in a parallel list
+        self._by_cost = []
+        self._costs = []
+        
+        for item in self._items:
+            self._index_item(item)
+            
+    def _index_item(self, item):
+        """
+        Add entries for the current cost of item to the indexes
+        """
+        cost = self._build_info.get_cost(item)
+        position = self._positions[item]
+        # ties on cost go to the last item, as in strategy_cheap
+        heapq.heappush(self._cost_heap, (cost, -position, item))
+        heapq.heappush(self._payback_heap, 
+                       (cost / self._build_info.get_cps(item), position, item))
+        index = bisect.bisect(self._by_cost, (cost, item))
+        self._by_cost.insert(index, (cost, item))
+        self._costs.insert(index, cost)
+        
+    def _is_current(self, cost, item):
+        """
+        Return whether a heap entry with cost is up to date for item
+        """
+        return self._build_info.get_cost(item) == cost
+    
+    def _is_current_payback(self, payback, item):
+        """
+        Return whether a payback heap entry with payback is up to 
+        date for item, computed exactly as _index_item does
+        """
+        return self._build_info.get_cost(item) / self._build_info.get_cps(item) == payback
+            
+    def build_items(self):
+        """
+        Return a list of all the items
+        """
+        return list(self._items)
+    
+    def get_cost(self, item):
+        """
+        Return the current cost of item
+        """
+        return self._build_info.get_cost(item)
+    
+    def get_cps(self, item):
+        """
+        Return the CPS of item
+        """
+        return self._build_info.get_cps(item)
+    
+    def update_item(self, item, count = 1):
+        """
+        Update the cost of item after count purchases and reindex it
+        """
+        old_cost = self._build_info.get_cost(item)
+        index = bisect.bisect_left(self._by_cost, (old_cost, item))
+        del self._by_cost[index]
+        del self._costs[index]
+        for dummy_idx in range(count):
+            self._build_info.update_item(item)
+        self._index_item(item)
+        
+        # keep stale heap entries from piling up
+        if len(self._cost_heap) > 4 * len(self._items):
+            self._cost_heap = [entry for entry in self._cost_heap 
+                               if self._is_current(entry[0], entry[2])]
+            heapq.heapify(self._cost_heap)
+        if len(self._payback_heap) > 4 * len(self._items):
+            self._payback_heap = [entry for entry in self._payback_heap
+                                  if self._is_current_payback(entry[0], entry[2])]
+            heapq.heapify(self._payback_heap)
+        
+    def clone(self):
+        """
+        Return a new context over a clone of the build info
+        """
+        return StrategyContext(self._build_info.clone())
+    
+    def future_costs(self, item):
+        """
+        Generator of the current cost of item followed by its cost 
+        after each further purchase, worked out on a clone of the
+        build info so the context itself is left unchanged
+        """
+        build_copy = self._build_info.clone()
+        while True:
+            yield build_copy.get_cost(item)
+            build_copy.update_item(item)
+        
+    def cheapest(self, max_cost):
+        """
+        Return the cheapest item costing at most max_cost, the last 
+        one in build_items on ties, or None if there is none
+        """
+        heap = self._cost_heap
+        while not self._is_current(heap[0][0], heap[0][2]):
+            heapq.heappop(heap)
+        if heap[0][0] <= max_cost:
+            return heap[0][2]
+        return None
+    
+    def most_expensive(self, max_cost):
+        """
+        Return the most expensive item costing at most max_cost, the
+        first one in build_items on ties, or None if there is none
+        """
+        index = bisect.bisect_right(self._costs, max_cost) - 1
+        if index < 0:
+            return None
+        cost, item = self._by_cost[index]
+        while index > 0 and self._by_cost[index - 1][0] == cost:
+            index -= 1
+            if self._positions[self._by_cost[index][1]] < self._positions[item]:
+                item = self._by_cost[index][1]
+        return item
+    
+    def best_payback(self, max_cost):
+        """
+        Return the item with the shortest payback time (cost / cps)
+        among those costing at most max_cost, or None if there is none
+        """
+        heap = self._payback_heap
+        skipped = []
+        best_item = None
+        while heap != []:
+            entry = heapq.heappop(heap)
+            if not self._is_current_payback(entry[0], entry[2]):
+                continue
+            skipped.append(entry)
+            if self._build_info.get_cost(entry[2]) <= max_cost:
+                best_item = entry[2]
+                break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return best_item
+    
+    def by_cost(self):
+        """
+        Return a list of (cost, item) pairs sorted by cost then item,
+        the list must not be modified
+        """
+        return self._by_cost
+    
+    
+def clicker_steps(build_info, duration, strategy, run_limit = None):
+    """
+    Generator that runs the purchase loop of simulate_clicker and
+    yields its ClickerState, once at the start and then after each
+    purchase (or bulk run of purchases).  The state is updated in
+    place, so copy anything that is needed after the next step.
     """
 
-    build_copy = build_info.clone()
+    # strategies query the item indexes of the context
+    build_copy = StrategyContext(build_info.clone())
     clicker = ClickerState()
+    # the view tracks new purchases, so it only needs creating once
+    history = clicker.get_history_view()
+            
+    yield clicker
     
     # iterate simulation over the duration time
     while clicker.get_time() <= duration:
         # get the item to buy from the strategy function
         item_to_get = strategy(clicker.get_cookies(), clicker.get_cps(),
-                               clicker.get_history(), duration - clicker.get_time(), 
+                               history, duration - clicker.get_time(), 
                                build_copy)
         # if no item, end simulation
         if item_to_get == None:
@@ -171,12 +504,89 @@ def simulate_clicker(build_info, duration, strategy):
         
         # update the build copy for the item just bought
         build_copy.update_item(item_to_get) 
+        
+        # buy every further purchase the strategy is known to repeat
+        # at once, the strategy is asked again once the run is over
+        if run_limit != None:
+            limit = run_limit(item_to_get, build_copy)
+            if build_copy.get_cost(item_to_get) < limit:
+                count = clicker.buy_run(item_to_get, build_copy.future_costs(item_to_get),
+                                        build_copy.get_cps(item_to_get), duration, limit)
+                if count > 0:
+                    build_copy.update_item(item_to_get, count)
+        yield clicker
+        
+def simulate_clicker(build_info, duration, strategy, run_limit = None):
+    """
+    Function to run a Cookie Clicker game for the given
+    duration with the given strategy.  Returns a ClickerState
+    object corresponding to the final state of the game.
+
+    run_limit is an optional function (item, build_info) giving 
+    the cost below which the strategy is certain to pick item again
+    once it has bought it, such as run_limit_cheap for 
+    strategy_cheap.  Those purchases are then made in bulk.
+    """
+    
+    for clicker in clicker_steps(build_info, duration, strategy, run_limit):
+        pass
     
     # allow clicker to finish simulation duration if there is extra time
     clicker.wait(duration - clicker.get_time())
     
     return clicker
 
+def iter_checkpoints(build_info, checkpoints, strategy):
+    """
+    Generator that runs one Cookie Clicker game up to the last of 
+    the sorted checkpoint times and yields a snapshot of the state
+    at each checkpoint as soon as the game passes it.
+
+    Snapshots are tuples of (time, current cookies, total cookies, 
+    cps, number of purchases).  The strategy sees the time left to
+    the last checkpoint, so for strategies that do not depend on 
+    the time left other than to check affordability (such as 
+    strategy_cheap, strategy_cursor_broken or a strategy_plan) the 
+    snapshots equal the final states of simulate_clicker run to 
+    each checkpoint.
+    """
+    if checkpoints == []:
+        return
+    
+    index = 0
+    for clicker in clicker_steps(build_info, checkpoints[-1], strategy):
+        # checkpoints before this purchase see the previous state
+        # waiting, purchases made exactly at a checkpoint count
+        while index < len(checkpoints) and checkpoints[index] < clicker.get_time():
+            yield checkpoint_snapshot(checkpoints[index], *previous)
+            index += 1
+        previous = (clicker.get_time(), clicker.get_cookies(), 
+                    clicker.get_total_cookies(), clicker.get_cps(), 
+                    len(clicker.get_history_view()) - 1)
+        
+    while index < len(checkpoints):
+        yield checkpoint_snapshot(checkpoints[index], *previous)
+        index += 1
+
+def checkpoint_snapshot(checkpoint, now, cookies, total_cookies, cps, purchases):
+    """
+    Return the snapshot tuple after waiting from now to checkpoint,
+    with the same arithmetic as ClickerState.wait
+    """
+    wait_time = checkpoint - now
+    if wait_time > 0.0:
+        cookies += wait_time * cps
+        total_cookies += wait_time * cps
+        now += wait_time
+    return (now, cookies, total_cookies, cps, purchases)
+
+def simulate_checkpoints(build_info, checkpoints, strategy):
+    """
+    Return the list of iter_checkpoints snapshots, one for each of
+    the sorted checkpoint times
+    """
+    return list(iter_checkpoints(build_info, checkpoints, strategy))
+
 def strategy_cursor_broken(cookies, cps, history, time_left, build_info):
     """
     Always pick Cursor!
@@ -207,6 +617,9 @@ def strategy_cheap(cookies, cps, history, time_left, build_info):
     # maximum cookies to be able to get in the time left
     max_cookies = cookies + cps * time_left
     
+    if isinstance(build_info, StrategyContext):
+        return build_info.cheapest(max_cookies)
+    
     cheap_item = None
     cheap_item_cost = float("inf")
     
@@ -228,6 +641,9 @@ def strategy_expensive(cookies, cps, history, time_left, build_info):
     #maximum cookies to be able to get in the time left
     max_cookies = cookies + cps * time_left
     
+    if isinstance(build_info, StrategyContext):
+        return build_info.most_expensive(max_cookies)
+    
     expensive_item = None
     expensive_item_cost = float("-inf")
     
@@ -241,45 +657,455 @@ def strategy_expensive(cookies, cps, history, time_left, build_info):
     
     return expensive_item
 
-def strategy_best(cookies, cps, history, time_left, build_info):
+def default_costs():
     """
-    The best strategy that you are able to implement.
+    Return a dictionary of the default cost of every item, the 
+    dictionary is built once and must not be modified
+    """
+    if _DEFAULT_COSTS == {}:
+        build_default = provided.BuildInfo()
+        for item in build_default.build_items():
+            _DEFAULT_COSTS[item] = build_default.get_cost(item)
+    return _DEFAULT_COSTS
+
+_DEFAULT_COSTS = {}
+
+def strategy_payback(cookies, cps, history, time_left, build_info):
+    """
+    Always buy the item that pays for itself the fastest among 
+    those you can afford in the time left.
     """
     
-    # get a sorted list of default items in build
-    build_copy = provided.BuildInfo()
-    default_order = [(build_copy.get_cost(item), item) 
-                     for item in build_copy.build_items()]
-    default_order.sort()
+    max_cookies = cookies + cps * time_left
     
-    # make a dictionary out of this ordered list
-    default_dic = {}
-    for cost, item in default_order:
-        default_dic[item] = cost
+    if isinstance(build_info, StrategyContext):
+        return build_info.best_payback(max_cookies)
+    
+    payback_item = None
+    payback_time = float("inf")
+    
+    for item in build_info.build_items():
+        item_cost = build_info.get_cost(item)
+        item_payback = item_cost / build_info.get_cps(item)
+        
+        if item_payback < payback_time and item_cost <= max_cookies:
+            payback_item = item
+            payback_time = item_payback
+    
+    return payback_item
+
+def strategy_best(cookies, cps, history, time_left, build_info, 
+                  cost_ratio = BEST_COST_RATIO):
+    """
+    The best strategy that you are able to implement.
+
+    cost_ratio is the cost increase over the default price up to
+    which an item is bought cheapest first
+    """
+    
+    default_dic = default_costs()
     
     # get maximum cookies able to be generated in time left
     max_cookies = cookies + cps * time_left
     
     # generate a shopping list of all purchaseable items
-    shopping_list = []
-    for item in build_copy.build_items():
-        item_cost = build_info.get_cost(item)
-        if item_cost < max_cookies:
-            shopping_list.append((item_cost, item))
-    shopping_list.sort()
+    # (the context keeps it sorted, but it includes every item)
+    if isinstance(build_info, StrategyContext):
+        shopping_list = build_info.by_cost()
+    else:
+        shopping_list = []
+        for item in default_dic:
+            item_cost = build_info.get_cost(item)
+            if item_cost < max_cookies:
+                shopping_list.append((item_cost, item))
+        shopping_list.sort()
     
-    if shopping_list == []:
+    if shopping_list == [] or shopping_list[0][0] >= max_cookies:
         return None
     
     # immediately return the first item which is below the 
     # default price multipled by a cost incrase constant
     for cost, item in shopping_list:
-        if cost <= default_dic[item] * 1.15 ** 124:
+        if cost >= max_cookies:
+            break
+        if cost <= default_dic[item] * cost_ratio:
             return item
             
     # if nothing else, return the most expensive available item        
     return strategy_expensive(cookies, cps, history, time_left, build_info)  
         
+# Optimal purchase plans
+
+def strategy_plan(plan):
+    """
+    Return a strategy that replays the list of items in plan, one
+    per purchase, and then buys nothing more.  The next item is 
+    found from the length of the history, so the strategy can be
+    used for any number of simulations.
+    """
+    def replay(cookies, cps, history, time_left, build_info):
+        """
+        Buy the next item of the plan
+        """
+        bought = len(history) - 1
+        if bought < len(plan):
+            return plan[bought]
+        return None
+    return replay
+
+def plan_of(state):
+    """
+    Return the list of items bought in a ClickerState
+    """
+    return [entry[1] for entry in state.get_history_view()][1:]
+
+def cookies_bound(total_cookies, cookies, cps, time_left, build_info):
+    """
+    Upper bound on the total cookies that can be reached within 
+    time_left from the given state.
+
+    Item costs never fall, so no purchase yields more than rate, 
+    the best CPS per cookie of any item now.  Spending every cookie 
+    as it arrives at that rate bounds the production P by 
+    P' <= cps + rate * (cookies + P), which solves to the bound.
+    """
+    if time_left <= 0.0:
+        return total_cookies
+    rate = max([build_info.get_cps(item) / build_info.get_cost(item) 
+                for item in build_info.build_items()])
+    if rate <= 0.0:
+        return total_cookies + cps * time_left
+    if rate * time_left > 700.0:
+        return float("inf")
+    return total_cookies + (cps + rate * cookies) / rate * math.expm1(rate * time_left)
+
+def search_plan(duration, build_info = None, state = None, time_budget = 10.0):
+    """
+    Branch and bound search for the purchase plan that maximizes
+    the total cookies at duration, starting from state (a new 
+    ClickerState by default) with the item costs in build_info.
+
+    Plans are explored depth first, most CPS per cookie first.  A
+    branch is pruned when cookies_bound cannot beat the best plan
+    found, or when another plan reached the same item counts at 
+    the same time with at least as many cookies and total cookies.
+    The heuristic strategies provide the first plans to beat.
+
+    Returns a tuple of the best total cookies, the list of items to
+    buy (usable with strategy_plan when starting from a new state)
+    and whether the search finished within time_budget seconds, 
+    which proves the plan optimal.
+    """
+    if build_info == None:
+        build_info = provided.BuildInfo()
+    if state == None:
+        state = ClickerState()
+    deadline = time.time() + time_budget
+    items = build_info.build_items()
+    
+    # the heuristics give a first plan to beat
+    best = [state.get_total_cookies() + 
+            state.get_cps() * max(duration - state.get_time(), 0.0), []]
+    if state.get_time() == 0.0 and len(state.get_history_view()) == 1:
+        for strategy in [strategy_cheap, strategy_expensive, strategy_best]:
+            final_state = simulate_clicker(build_info, duration, strategy)
+            if final_state.get_total_cookies() > best[0]:
+                best = [final_state.get_total_cookies(), plan_of(final_state)]
+    
+    # (item counts, time) -> list of (cookies, total cookies) reached
+    seen = {}
+    finished = [True]
+    
+    def dominated(counts, now, cookies, total_cookies):
+        """
+        Check and record a state against the others with the same
+        item counts at the same time
+        """
+        key = (counts, now)
+        reached = seen.setdefault(key, [])
+        for other_cookies, other_total in reached:
+            if other_cookies >= cookies and other_total >= total_cookies:
+                return True
+        reached.append((cookies, total_cookies))
+        return False
+    
+    def explore(now, cookies, total_cookies, cps, build, counts, plan):
+        """
+        Depth first search from one state, plan is the items bought
+        to reach it and is extended in place
+        """
+        if time.time() > deadline:
+            finished[0] = False
+            return
+        
+        # value of buying nothing more
+        final_cookies = total_cookies
+        if duration - now > 0.0:
+            final_cookies += (duration - now) * cps
+        if final_cookies > best[0]:
+            best[0] = final_cookies
+            best[1] = list(plan)
+        
+        if cookies_bound(total_cookies, cookies, cps, 
+                         duration - now, build) <= best[0]:
+            return
+        
+        children = sorted(items, key = lambda item: 
+                          -build.get_cps(item) / build.get_cost(item))
+        for item in children:
+            # the same steps as simulate_clicker, time_until and wait
+            cost = build.get_cost(item)
+            if cookies >= cost:
+                time_needed = 0.0
+            else:
+                time_needed = math.ceil((cost - cookies) / cps)
+            if now + time_needed > duration:
+                continue
+            new_cookies = cookies + time_needed * cps
+            new_total = total_cookies + time_needed * cps
+            if new_cookies < cost:
+                continue
+            
+            idx = items.index(item)
+            new_counts = counts[:idx] + (counts[idx] + 1,) + counts[idx + 1:]
+            if dominated(new_counts, now + time_needed, new_cookies - cost, new_total):
+                continue
+            
+            new_build = build.clone()
+            new_build.update_item(item)
+            plan.append(item)
+            explore(now + time_needed, new_cookies - cost, new_total, 
+                    cps + build.get_cps(item), new_build, new_counts, plan)
+            plan.pop()
+            
+            if not finished[0]:
+                return
+    
+    explore(state.get_time(), state.get_cookies(), state.get_total_cookies(),
+            state.get_cps(), build_info.clone(), (0,) * len(items), [])
+    
+    return (best[0], best[1], finished[0])
+
+def run_plan_benchmark(durations = [100.0, 300.0, 1000.0, 3000.0], time_budget = 10.0):
+    """
+    Compare the heuristic strategies against the best plans found
+    by search_plan
+    """
+    for duration in durations:
+        start = time.time()
+        best_total, plan, optimal = search_plan(duration, time_budget = time_budget)
+        print "Duration", duration, ":", best_total, "cookies with", len(plan), 
+        print "purchases,", 
+        if optimal:
+            print "optimal,",
+        else:
+            print "best found,",
+        print "searched for", time.time() - start, "seconds"
+        
+        # the replayed plan reaches the same total
+        state = simulate_clicker(provided.BuildInfo(), duration, strategy_plan(plan))
+        assert state.get_total_cookies() == best_total, "plan replay differs"
+        
+        for strategy_name, strategy in [("Cheap", strategy_cheap), 
+                                        ("Expensive", strategy_expensive), 
+                                        ("Best", strategy_best)]:
+            state = simulate_clicker(provided.BuildInfo(), duration, strategy)
+            print " ", strategy_name, ":", state.get_total_cookies(), 
+            print "cookies,", state.get_total_cookies() / best_total, "of best"
+        
+# Bulk purchasing
+
+def run_limit_cheap(item, build_info):
+    """
+    Return the cost below which strategy_cheap picks item again: the
+    cost of the cheapest other item.  Ties are left to the strategy.
+    """
+    if isinstance(build_info, StrategyContext):
+        for cost, other in build_info.by_cost()[:2]:
+            if other != item:
+                return cost
+        return float("inf")
+    
+    limit = float("inf")
+    for other in build_info.build_items():
+        if other != item:
+            limit = min(build_info.get_cost(other), limit)
+    return limit
+
+def run_limit_cursor(item, build_info):
+    """
+    strategy_cursor_broken picks Cursor at any cost
+    """
+    return float("inf")
+
+def run_bulk_benchmark(duration = SIM_TIME, growths = [provided.BUILD_GROWTH, 1.001]):
+    """
+    Time strategies with bulk purchasing against the same strategy
+    stepped one purchase at a time, for each growth factor of the
+    item costs, and check that both reach the same final state.
+    Slow cost growth gives long runs of the same item.
+    """
+    calls = [0]
+    def counted(strategy):
+        """
+        Wrap strategy to count how often it is called
+        """
+        def counted_strategy(cookies, cps, history, time_left, build_info):
+            """
+            Count the call and defer to strategy
+            """
+            calls[0] += 1
+            return strategy(cookies, cps, history, time_left, build_info)
+        return counted_strategy
+    
+    for growth in growths:
+        for strategy_name, strategy, run_limit in [
+                ("Cheap", strategy_cheap, run_limit_cheap),
+                ("Cursor", strategy_cursor_broken, run_limit_cursor)]:
+            states = []
+            for mode, mode_run_limit in [("bulk", run_limit), ("stepped", None)]:
+                calls[0] = 0
+                start = time.time()
+                states.append(simulate_clicker(provided.BuildInfo(None, growth), duration, 
+                                               counted(strategy), mode_run_limit))
+                print strategy_name, "growth", growth, "(" + mode + ") :", 
+                print time.time() - start, "seconds,", calls[0], "strategy calls for", 
+                print len(states[-1].get_history_view()) - 1, "purchases"
+        
+            assert str(states[0]) == str(states[1]), "final states differ"
+            assert states[0].get_history() == states[1].get_history(), "histories differ"
+        
+# Strategy sweeps
+
+# name -> (strategy, run_limit), the strategies a sweep can run
+SWEEP_STRATEGIES = {"Cursor": (strategy_cursor_broken, run_limit_cursor),
+                    "Cheap": (strategy_cheap, run_limit_cheap),
+                    "Expensive": (strategy_expensive, None),
+                    "Payback": (strategy_payback, None),
+                    "Best": (strategy_best, None)}
+
+SWEEP_FIELDS = ["strategy", "param", "duration", "total_cookies", 
+                "cps", "purchases", "seconds"]
+
+def run_sweep_job(job):
+    """
+    Run one (strategy name, param, duration) job of a sweep.  A 
+    param that is not None is passed to the strategy as its last
+    argument.
+
+    Returns a dictionary with an entry for each of SWEEP_FIELDS
+    """
+    strategy_name, param, duration = job
+    strategy, run_limit = SWEEP_STRATEGIES[strategy_name]
+    if param != None:
+        base_strategy = strategy
+        strategy = lambda cookies, cps, history, time_left, build_info: \
+            base_strategy(cookies, cps, history, time_left, build_info, param)
+    
+    start = time.time()
+    state = simulate_clicker(provided.BuildInfo(), duration, strategy, run_limit)
+    
+    return {"strategy": strategy_name, 
+            "param": repr(param), 
+            "duration": repr(duration),
+            "total_cookies": repr(state.get_total_cookies()),
+            "cps": repr(state.get_cps()),
+            "purchases": len(state.get_history_view()) - 1,
+            "seconds": repr(time.time() - start)}
+
+def read_sweep(filename):
+    """
+    Return the result rows of a sweep CSV file as dictionaries,
+    or an empty list if the file does not exist yet
+    """
+    if not os.path.exists(filename):
+        return []
+    with open(filename, "rb") as sweep_file:
+        return list(csv.DictReader(sweep_file))
+    
+def run_sweep(strategy_params, durations, filename, processes = None):
+    """
+    Run every combination of strategy, param and duration across a
+    process pool, appending each result to the CSV file filename 
+    as soon as it finishes.
+
+    strategy_params: dictionary of strategy name (a key of 
+    SWEEP_STRATEGIES) to a list of params, [None] for no param
+    durations: list of simulation durations
+    processes: pool size, defaults to the number of cores
+
+    Jobs already in filename are skipped, so an interrupted sweep
+    resumes where it stopped.  Returns all of the result rows.
+    """
+    rows = read_sweep(filename)
+    done = set([(row["strategy"], row["param"], row["duration"]) for row in rows])
+    
+    jobs = []
+    for strategy_name in sorted(strategy_params):
+        for param in strategy_params[strategy_name]:
+            for duration in durations:
+                if (strategy_name, repr(param), repr(duration)) not in done:
+                    jobs.append((strategy_name, param, duration))
+    
+    if multiprocessing != None and processes != 1:
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(run_sweep_job, jobs)
+    else:
+        pool = None
+        results = (run_sweep_job(job) for job in jobs)
+    
+    # a sweep stopped before its first result leaves just the header
+    new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
+    with open(filename, "ab") as sweep_file:
+        writer = csv.DictWriter(sweep_file, SWEEP_FIELDS)
+        if new_file:
+            writer.writeheader()
+        for row in results:
+            writer.writerow(row)
+            sweep_file.flush()
+            rows.append(dict([(field, str(row[field])) for field in SWEEP_FIELDS]))
+            
+    if pool != None:
+        pool.close()
+        pool.join()
+            
+    return rows
+
+def summarize_sweep(filename, top = 5):
+    """
+    Print the top strategy and param combinations by total cookies
+    for each duration in a sweep CSV file
+    """
+    by_duration = {}
+    for row in read_sweep(filename):
+        by_duration.setdefault(float(row["duration"]), []).append(row)
+        
+    for duration in sorted(by_duration):
+        ranking = sorted(by_duration[duration], 
+                         key = lambda row: float(row["total_cookies"]), 
+                         reverse = True)
+        print "Duration", duration
+        for rank in range(min(top, len(ranking))):
+            row = ranking[rank]
+            print " ", rank + 1, row["strategy"], row["param"], ":", 
+            print row["total_cookies"], "cookies,", row["cps"], "cps,", 
+            print row["purchases"], "purchases"
+
+def run_best_sweep(filename = "clicker_sweep.csv"):
+    """
+    Sweep the strategy_best cost ratio against the other 
+    strategies and print the ranking
+    """
+    strategy_params = {"Cheap": [None], 
+                       "Expensive": [None],
+                       "Best": [1.15 ** exponent for exponent in range(100, 150, 4)]}
+    durations = [SIM_TIME / 10 ** power for power in range(5)]
+    
+    start = time.time()
+    run_sweep(strategy_params, durations, filename)
+    print "Sweep took", time.time() - start, "seconds"
+    summarize_sweep(filename)
+        
 def run_strategy(strategy_name, time, strategy):
     """
     Run a simulation for the given time with one strategy.
@@ -296,6 +1122,80 @@ def run_strategy(strategy_name, time, strategy):
 #    history = [(item[0], item[3]) for item in history]
 #    simpleplot.plot_lines(strategy_name, 1000, 400, 'Time', 'Total Cookies', [history], True)
 
+def plot_strategy(strategy_name, time, strategy, num_points = 100):
+    """
+    Plot total cookies against duration for one strategy, from a 
+    single simulation streamed through evenly spaced checkpoints
+    """
+    checkpoints = [time * idx / num_points for idx in range(1, num_points + 1)]
+    points = [(snapshot[0], snapshot[2]) for snapshot in 
+              iter_checkpoints(provided.BuildInfo(), checkpoints, strategy)]
+    simpleplot.plot_lines(strategy_name, 1000, 400, 'Time', 'Total Cookies', [points], True)
+    
+def run_checkpoint_benchmark(duration = SIM_TIME, num_points = 100):
+    """
+    Time one checkpointed simulation of strategy_cheap against a 
+    separate simulation for each checkpoint, and check that both
+    give the same states.
+    """
+    checkpoints = [duration * idx / num_points for idx in range(1, num_points + 1)]
+    
+    start = time.time()
+    snapshots = simulate_checkpoints(provided.BuildInfo(), checkpoints, strategy_cheap)
+    print "Checkpointed :", time.time() - start, "seconds"
+    
+    start = time.time()
+    states = [simulate_clicker(provided.BuildInfo(), checkpoint, strategy_cheap) 
+              for checkpoint in checkpoints]
+    print "Separate runs :", time.time() - start, "seconds"
+    
+    for snapshot, state in zip(snapshots, states):
+        assert snapshot == (state.get_time(), state.get_cookies(), 
+                            state.get_total_cookies(), state.get_cps(),
+                            len(state.get_history_view()) - 1), "states differ"
+
+def run_history_benchmark(duration = SIM_TIME):
+    """
+    Time strategy_cheap using the history view against the same
+    strategy given a copied history list every step.
+    """
+    def strategy_cheap_copied(cookies, cps, history, time_left, build_info):
+        """
+        strategy_cheap paying for a history copy, as get_history did
+        """
+        return strategy_cheap(cookies, cps, list(history), time_left, build_info)
+    
+    for strategy_name, strategy in [("Cheap (view)", strategy_cheap),
+                                    ("Cheap (copied)", strategy_cheap_copied)]:
+        start = time.time()
+        state = simulate_clicker(provided.BuildInfo(), duration, strategy)
+        elapsed = time.time() - start
+        print strategy_name, ":", len(state.get_history_view()) - 1, 
+        print "purchases in", elapsed, "seconds"
+
+def check_strategy_context(num_updates = 20000, seed = 0):
+    """
+    Update random items of a StrategyContext in random order and
+    check every query against a full scan of the items after each
+    update, with random affordability limits
+    """
+    rand = random.Random(seed)
+    build_info = provided.BuildInfo()
+    context = StrategyContext(build_info.clone())
+    items = build_info.build_items()
+    
+    for dummy_idx in range(num_updates):
+        item = rand.choice(items)
+        build_info.update_item(item)
+        context.update_item(item)
+        
+        max_cost = rand.choice(items)
+        max_cost = build_info.get_cost(max_cost) * rand.uniform(0.5, 2.0)
+        for strategy in [strategy_cheap, strategy_expensive, strategy_payback]:
+            assert (strategy(max_cost, 0.0, [], 0.0, context) == 
+                    strategy(max_cost, 0.0, [], 0.0, build_info)), strategy.__name__
+    print num_updates, "updates checked"
+
 def run(strategy):
     """
     Run the simulator.
@@ -308,6 +1208,12 @@ def run(strategy):
     # run_strategy("Best", SIM_TIME, strategy_best)
     
 # run(strategy_best)
+# run_history_benchmark()
+# run_bulk_benchmark()
+# run_best_sweep()
+# run_plan_benchmark()
+# run_checkpoint_benchmark()
+# check_strategy_context()
 
 # print
 # print strategy_best(0, 10000.0, [(1, "Clicker")], 1000000, provided.BuildInfo())
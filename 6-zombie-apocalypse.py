@@ -11,10 +11,35 @@ http://www.codeskulptor.org/#user40_iQQZl747fQ_13.py
 """
 
 import random
+import time
+import os
+import mmap
+import struct
+import ctypes
+import bisect
+from array import array
 import poc_grid
 import poc_queue
 import poc_zombie_gui
 
+# NumPy is optional, batched movement is only used when present
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# multiprocessing is optional, for parallel distance fields
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+# resource is only used by run_memory_benchmark
+try:
+    import resource
+except ImportError:
+    resource = None
+
 # global constants
 EMPTY = 0 
 FULL = 1
@@ -24,6 +49,13 @@ OBSTACLE = 5
 HUMAN = 6
 ZOMBIE = 7
 
+# populations at least this large move in one batch with NumPy
+BATCH_MIN_ENTITIES = 256
+
+# (row, col) moves, staying put first, for batched movement
+FOUR_WAY_MOVES = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+EIGHT_WAY_MOVES = FOUR_WAY_MOVES + [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
 
 class Apocalypse(poc_grid.Grid):
     """
@@ -38,6 +70,31 @@ class Apocalypse(poc_grid.Grid):
         humans, and zombies
         """
         poc_grid.Grid.__init__(self, grid_height, grid_width)
+        # flat copy of the obstacle grid, one byte per cell, kept in
+        # sync by set_full, set_empty and clear
+        self._obstacles = bytearray(grid_height * grid_width)
+        self._init_state(obstacle_list, zombie_list, human_list)
+        
+    def _init_state(self, obstacle_list, zombie_list, human_list):
+        """
+        Set up everything but the obstacle grid, then add the
+        obstacles, zombies and humans
+        """
+        # incremental mode keeps entity type -> [flat distance field,
+        # set of source cells, set of cells set full or empty since]
+        self._incremental = False
+        self._field_caches = {}
+        # number of processes searching each distance field
+        self._processes = 1
+        # versions of the obstacles, humans and zombies, bumped on 
+        # every change, and entity type -> ((obstacle version, entity
+        # version), flat distance field) of the last field computed
+        self._obstacle_version = 0
+        self._human_version = 0
+        self._zombie_version = 0
+        self._distance_cache = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
         if obstacle_list != None:
             for cell in obstacle_list:
                 self.set_full(cell[0], cell[1])
@@ -49,6 +106,9 @@ class Apocalypse(poc_grid.Grid):
             self._human_list = list(human_list)  
         else:
             self._human_list = []
+        # where the humans and zombies are, see SpatialIndex
+        self._human_index = SpatialIndex(self._human_list)
+        self._zombie_index = SpatialIndex(self._zombie_list)
         
     def clear(self):
         """
@@ -56,14 +116,45 @@ class Apocalypse(poc_grid.Grid):
         Reset zombie and human lists to be empty
         """
         poc_grid.Grid.clear(self)
+        self._obstacles = bytearray(len(self._obstacles))
+        self._field_caches = {}
         self._zombie_list = []
         self._human_list = []
+        self._human_index = SpatialIndex()
+        self._zombie_index = SpatialIndex()
+        self._obstacle_version += 1
+        self._human_version += 1
+        self._zombie_version += 1
+        
+    def set_full(self, row, col):
+        """
+        Set cell with index (row, col) to be full
+        """
+        poc_grid.Grid.set_full(self, row, col)
+        cell = row * poc_grid.Grid.get_grid_width(self) + col
+        self._obstacles[cell] = FULL
+        self._obstacle_version += 1
+        for cache in self._field_caches.values():
+            cache[2].add(cell)
+        
+    def set_empty(self, row, col):
+        """
+        Set cell with index (row, col) to be empty
+        """
+        poc_grid.Grid.set_empty(self, row, col)
+        cell = row * poc_grid.Grid.get_grid_width(self) + col
+        self._obstacles[cell] = EMPTY
+        self._obstacle_version += 1
+        for cache in self._field_caches.values():
+            cache[2].add(cell)
         
     def add_zombie(self, row, col):
         """
         Add zombie to the zombie list
         """
         self._zombie_list.append((row, col))
+        self._zombie_version += 1
+        self._zombie_index.add(row, col)
                 
     def num_zombies(self):
         """
@@ -85,6 +176,8 @@ class Apocalypse(poc_grid.Grid):
         Add human to the human list
         """
         self._human_list.append((row, col))
+        self._human_version += 1
+        self._human_index.add(row, col)
         
     def num_humans(self):
         """
@@ -100,55 +193,103 @@ class Apocalypse(poc_grid.Grid):
         for human in self._human_list:
             yield human
         
-    def compute_distance_field(self, entity_type):
+    def set_incremental(self, incremental):
         """
-        Function computes and returns a 2D distance field
-        Distance at member of entity_list is zero
-        Shortest paths avoid obstacles and use four-way distances
+        Turn incremental distance fields on or off.  When on, each
+        distance field is kept and repaired only where sources moved
+        or obstacles changed, with the same result as a full search.
         """
+        self._incremental = incremental
+        self._field_caches = {}
         
-        height = poc_grid.Grid.get_grid_height(self)
-        width = poc_grid.Grid.get_grid_width(self)
+    def set_processes(self, processes):
+        """
+        Set the number of processes that search each distance field
+        from scratch, see parallel_distance_field.  Fields are the
+        same for any number of processes.
+        """
+        self._processes = processes
         
-        # create a visited grid of same dimensions that is empty        
-        visited = poc_grid.Grid(height, width)
-        # create a distance list of same dimensions that contains large value
-        distance_field = [[height * width for dummy_width in range(width)] \
-                          for dummy_height in range(height)]
+    def _search(self, sources):
+        """
+        Return a new flat distance field from a set of source cells
+        """
+        height = self.get_grid_height()
+        width = self.get_grid_width()
+        if self._processes > 1 and multiprocessing != None:
+            return parallel_distance_field(self._obstacles, height, width, sources, 
+                                           self._processes)
+        return flat_distance_field(self._obstacles, height, width, sources)
+        
+    def compute_flat_distance_field(self, entity_type):
+        """
+        Function computes and returns the distance field as a flat
+        row-major array, see compute_distance_field.  The array is
+        returned again while the obstacles and entities are unchanged,
+        and in incremental mode it is reused by the next call, so it
+        must not be modified.
+        """
         
-        # queue of entity_type list
-        boundary = poc_queue.Queue()
+        height = self.get_grid_height()
+        width = self.get_grid_width()
         
-        # enqueue all instances of entity_type
         if entity_type is HUMAN:
-            for human in self._human_list:
-                boundary.enqueue(human)
+            entity_list = self._human_list
+            versions = (self._obstacle_version, self._human_version)
         else:
-            for zombie in self._zombie_list:
-                boundary.enqueue(zombie)
-        
-        # update distance_field to 0 and visited to FULL for entities
-        for entity in boundary:
-            visited.set_full(entity[0], entity[1])
-            distance_field[entity[0]][entity[1]] = 0
+            entity_list = self._zombie_list
+            versions = (self._obstacle_version, self._zombie_version)
             
-        # implementation of breadth-first search on these entities
-        while len(boundary) is not 0:
-            current_cell = boundary.dequeue()
+        cached = self._distance_cache.get(entity_type)
+        if cached != None and cached[0] == versions:
+            self._cache_hits += 1
+            return cached[1]
+        self._cache_misses += 1
+        
+        sources = set([row * width + col for row, col in entity_list])
+        
+        if not self._incremental:
+            distances = self._search(sources)
+        else:
+            cache = self._field_caches.get(entity_type)
+            if cache != None:
+                distances, old_sources, changed_cells = cache
+                # large changes are cheaper to search from scratch
+                num_changes = len(changed_cells) + len(sources ^ old_sources)
+                if num_changes * 16 <= height * width:
+                    repair_distance_field(distances, self._obstacles, height, width,
+                                          old_sources, sources, changed_cells)
+                else:
+                    distances = self._search(sources)
+            else:
+                distances = self._search(sources)
+            self._field_caches[entity_type] = [distances, sources, set()]
             
-            for neighbor_cell in poc_grid.Grid.four_neighbors(self, current_cell[0], current_cell[1]):
-                # first check if this neighbor cell is a wall
-                if not poc_grid.Grid.is_empty(self, neighbor_cell[0], neighbor_cell[1]):
-                    visited.set_full(neighbor_cell[0], neighbor_cell[1])
-                # otherwise check empty cell as usual
-                elif visited.is_empty(neighbor_cell[0], neighbor_cell[1]):
-                    visited.set_full(neighbor_cell[0], neighbor_cell[1])
-                    boundary.enqueue(neighbor_cell)
-                    # also update distance of each neighbor cell
-                    new_distance = distance_field[current_cell[0]][current_cell[1]] + 1
-                    distance_field[neighbor_cell[0]][neighbor_cell[1]] = new_distance
-                        
-        return distance_field
+        self._distance_cache[entity_type] = (versions, distances)
+        return distances
+        
+    def get_cache_stats(self):
+        """
+        Return a dictionary of the number of distance fields that
+        were cached ("hits") and that had to be computed ("misses")
+        """
+        return {"hits": self._cache_hits, "misses": self._cache_misses}
+        
+    def compute_distance_field(self, entity_type):
+        """
+        Function computes and returns a 2D distance field
+        Distance at member of entity_list is zero
+        Shortest paths avoid obstacles and use four-way distances
+        """
+        
+        height = self.get_grid_height()
+        width = self.get_grid_width()
+        
+        distances = self.compute_flat_distance_field(entity_type)
+        
+        # unflatten into rows
+        return [distances[row * width: (row + 1) * width].tolist() 
+                for row in range(height)]
     
     def move_humans(self, zombie_distance_field):
         """
@@ -156,6 +297,10 @@ class Apocalypse(poc_grid.Grid):
         are allowed
         """
         
+        if numpy is not None and len(self._human_list) >= BATCH_MIN_ENTITIES:
+            self.move_humans_batch(zombie_distance_field)
+            return
+        
         # first create an empty list
         human_list_copy = []
         # iterate over all human in list
@@ -164,9 +309,9 @@ class Apocalypse(poc_grid.Grid):
             # a list of possible choices
             best_moves = [human]
             
-            for neighbor in poc_grid.Grid.eight_neighbors(self, human[0], human[1]):
+            for neighbor in self.eight_neighbors(human[0], human[1]):
                 # neighbor should not be a wall 
-                if poc_grid.Grid.is_empty(self, neighbor[0], neighbor[1]):
+                if self.is_empty(neighbor[0], neighbor[1]):
                     distance = zombie_distance_field[neighbor[0]][neighbor[1]]
                     # if distance is better (but not a wall), wipe old list
                     if distance > max_distance:
@@ -180,7 +325,7 @@ class Apocalypse(poc_grid.Grid):
             human_list_copy.append(random.choice(best_moves))
         
         # update self list with copy
-        self._human_list = human_list_copy
+        self._move_entities(HUMAN, human_list_copy)
     
     def move_zombies(self, human_distance_field):
         """
@@ -188,14 +333,18 @@ class Apocalypse(poc_grid.Grid):
         are allowed
         """
         
+        if numpy is not None and len(self._zombie_list) >= BATCH_MIN_ENTITIES:
+            self.move_zombies_batch(human_distance_field)
+            return
+        
         zombie_list_copy = []
         
         for zombie in self._zombie_list:
             min_distance = human_distance_field[zombie[0]][zombie[1]]
             best_moves = [zombie]
             
-            for neighbor in poc_grid.Grid.four_neighbors(self, zombie[0], zombie[1]):             
-                if poc_grid.Grid.is_empty(self, neighbor[0], neighbor[1]):
+            for neighbor in self.four_neighbors(zombie[0], zombie[1]):             
+                if self.is_empty(neighbor[0], neighbor[1]):
                     distance = human_distance_field[neighbor[0]][neighbor[1]]
                     if distance < min_distance:
                         min_distance = distance
@@ -205,9 +354,1073 @@ class Apocalypse(poc_grid.Grid):
                     
             zombie_list_copy.append(random.choice(best_moves))
             
-        self._zombie_list = zombie_list_copy
+        self._move_entities(ZOMBIE, zombie_list_copy)
+        
+    def move_humans_batch(self, zombie_distance_field):
+        """
+        Same as move_humans, but moves every human at once with
+        NumPy.  The distance field may also be flat or an array.
+        """
+        
+        self._move_entities(HUMAN, self._batch_moves(self._human_list, zombie_distance_field,
+                                                     EIGHT_WAY_MOVES, True))
+        
+    def move_zombies_batch(self, human_distance_field):
+        """
+        Same as move_zombies, but moves every zombie at once with
+        NumPy.  The distance field may also be flat or an array.
+        """
+        
+        self._move_entities(ZOMBIE, self._batch_moves(self._zombie_list, human_distance_field,
+                                                      FOUR_WAY_MOVES, False))
+        
+    def _move_entities(self, entity_type, entity_list):
+        """
+        Replace the humans or zombies with the same entities after a
+        move, keeping their version and spatial index up to date
+        """
+        if entity_type is HUMAN:
+            old_list = self._human_list
+            self._human_list = entity_list
+            self._human_version += 1
+            index = self._human_index
+        else:
+            old_list = self._zombie_list
+            self._zombie_list = entity_list
+            self._zombie_version += 1
+            index = self._zombie_index
+        
+        for old, new in zip(old_list, entity_list):
+            if old != new:
+                index.remove(old[0], old[1])
+                index.add(new[0], new[1])
+        
+    def count_humans_at(self, row, col):
+        """
+        Return the number of humans on cell (row, col)
+        """
+        return self._human_index.count(row, col)
+        
+    def count_zombies_at(self, row, col):
+        """
+        Return the number of zombies on cell (row, col)
+        """
+        return self._zombie_index.count(row, col)
+        
+    def humans_within(self, row, col, radius):
+        """
+        Return a list of the humans at most radius away from cell
+        (row, col), see SpatialIndex.within
+        """
+        return self._human_index.within(row, col, radius)
+        
+    def zombies_within(self, row, col, radius):
+        """
+        Return a list of the zombies at most radius away from cell
+        (row, col), see SpatialIndex.within
+        """
+        return self._zombie_index.within(row, col, radius)
+        
+    def captured_humans(self):
+        """
+        Return a list of the humans that share a cell with a zombie,
+        in the order they were added
+        """
+        zombie_index = self._zombie_index
+        return [human for human in self._human_list 
+                if zombie_index.count(human[0], human[1]) > 0]
+        
+    def _batch_moves(self, entity_list, distance_field, moves, farther):
+        """
+        Return the new entity list after moving every entity to the 
+        empty neighbor (or its own cell) with the largest distance if
+        farther, or else the smallest, picking ties at random
+        """
+        
+        if entity_list == []:
+            return []
+        
+        height = self.get_grid_height()
+        width = self.get_grid_width()
+        if isinstance(distance_field, array):
+            # flat fields share their buffer instead of being copied
+            distances = numpy.frombuffer(distance_field, dtype=distance_field.typecode)
+        else:
+            distances = numpy.asarray(distance_field)
+        distances = distances.reshape(height, width)
+        obstacles = numpy.frombuffer(self._obstacles, dtype=numpy.uint8)
+        obstacles = obstacles.reshape(height, width)
+        
+        # one row per entity, one column per move
+        positions = numpy.array(entity_list, dtype=numpy.intp)
+        moves = numpy.array(moves, dtype=numpy.intp)
+        rows = positions[:, 0:1] + moves[:, 0]
+        cols = positions[:, 1:2] + moves[:, 1]
+        valid = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        rows = numpy.where(valid, rows, 0)
+        cols = numpy.where(valid, cols, 0)
+        
+        # neighbors must be empty, staying put is always allowed
+        valid &= obstacles[rows, cols] == EMPTY
+        valid[:, 0] = True
+        
+        candidates = distances[rows, cols].astype(numpy.float64)
+        if farther:
+            candidates[~valid] = -numpy.inf
+            best = candidates.max(axis=1)
+        else:
+            candidates[~valid] = numpy.inf
+            best = candidates.min(axis=1)
+        
+        # uniform random keys on the tied moves pick one of them
+        keys = numpy.random.random_sample(candidates.shape)
+        keys[candidates != best[:, numpy.newaxis]] = -1.0
+        choices = keys.argmax(axis=1)
+        
+        entities = numpy.arange(len(entity_list))
+        return zip(rows[entities, choices].tolist(), cols[entities, choices].tolist())
+
+
+class CompactApocalypse(Apocalypse):
+    """
+    Apocalypse that keeps its obstacle grid only as one byte per
+    cell, without the lists of cells of poc_grid.Grid, for maps too
+    large to hold as lists.  The bytes can be a memory-mapped binary
+    map file, see load_binary_map.
+    """
+
+    def __init__(self, grid_height, grid_width, obstacle_list = None,
+                 zombie_list = None, human_list = None, obstacles = None):
+        """
+        Create a simulation of given size with given obstacles,
+        humans, and zombies.  obstacles is an optional ctypes array
+        of one unsigned byte per cell to use as the obstacle grid.
+        """
+        self._grid_height = grid_height
+        self._grid_width = grid_width
+        if obstacles == None:
+            obstacles = (ctypes.c_ubyte * (grid_height * grid_width))()
+        self._obstacles = obstacles
+        self._init_state(obstacle_list, zombie_list, human_list)
+
+    def __str__(self):
+        """
+        Return multi-line string representation for grid
+        """
+        width = self._grid_width
+        return "\n".join([str(list(self._obstacles[row * width: (row + 1) * width]))
+                          for row in range(self._grid_height)]) + "\n"
+
+    def clear(self):
+        """
+        Set cells in obstacle grid to be empty
+        Reset zombie and human lists to be empty
+        """
+        # cleared in place, a mapped file keeps its mapping
+        ctypes.memset(self._obstacles, EMPTY, len(self._obstacles))
+        self._field_caches = {}
+        self._zombie_list = []
+        self._human_list = []
+        self._human_index = SpatialIndex()
+        self._zombie_index = SpatialIndex()
+        self._obstacle_version += 1
+        self._human_version += 1
+        self._zombie_version += 1
+
+    def set_full(self, row, col):
+        """
+        Set cell with index (row, col) to be full
+        """
+        cell = row * self._grid_width + col
+        self._obstacles[cell] = FULL
+        self._obstacle_version += 1
+        for cache in self._field_caches.values():
+            cache[2].add(cell)
+
+    def set_empty(self, row, col):
+        """
+        Set cell with index (row, col) to be empty
+        """
+        cell = row * self._grid_width + col
+        self._obstacles[cell] = EMPTY
+        self._obstacle_version += 1
+        for cache in self._field_caches.values():
+            cache[2].add(cell)
+
+    def is_empty(self, row, col):
+        """
+        Checks whether cell with index (row, col) is empty
+        """
+        return self._obstacles[row * self._grid_width + col] == EMPTY
+
+class SpatialIndex:
+    """
+    Index of the cells of a group of entities, several of which may
+    share a cell.  A hash of cell -> number of entities answers
+    per-cell questions in constant time, and a coarse grid of
+    buckets of bucket_size x bucket_size cells holding their
+    occupied cells answers radius queries.
+    """
+
+    def __init__(self, entity_list = None, bucket_size = 8):
+        """
+        Create an index of a list of (row, col) entities
+        """
+        self._bucket_size = bucket_size
+        self._counts = {}
+        self._buckets = {}
+        if entity_list != None:
+            for row, col in entity_list:
+                self.add(row, col)
+
+    def __len__(self):
+        """
+        Return the number of entities
+        """
+        return sum(self._counts.values())
+
+    def add(self, row, col):
+        """
+        Add an entity on cell (row, col)
+        """
+        cell = (row, col)
+        count = self._counts.get(cell, 0)
+        self._counts[cell] = count + 1
+        if count == 0:
+            bucket = (row // self._bucket_size, col // self._bucket_size)
+            self._buckets.setdefault(bucket, set()).add(cell)
+
+    def remove(self, row, col):
+        """
+        Remove an entity from cell (row, col)
+        """
+        cell = (row, col)
+        count = self._counts[cell]
+        if count > 1:
+            self._counts[cell] = count - 1
+            return
+        del self._counts[cell]
+        bucket = (row // self._bucket_size, col // self._bucket_size)
+        self._buckets[bucket].discard(cell)
+        if not self._buckets[bucket]:
+            del self._buckets[bucket]
+
+    def count(self, row, col):
+        """
+        Return the number of entities on cell (row, col)
+        """
+        return self._counts.get((row, col), 0)
+
+    def shared_cells(self):
+        """
+        Return a list of the cells with more than one entity
+        """
+        return [cell for cell, count in self._counts.items() if count > 1]
+
+    def within(self, row, col, radius):
+        """
+        Return a list of the entities with a straight-line distance
+        of at most radius from cell (row, col), as one (row, col)
+        per entity in no particular order
+        """
+        size = self._bucket_size
+        entities = []
+        for bucket_row in range(int((row - radius) // size), 
+                                int((row + radius) // size) + 1):
+            for bucket_col in range(int((col - radius) // size), 
+                                    int((col + radius) // size) + 1):
+                for cell in self._buckets.get((bucket_row, bucket_col), ()):
+                    if (cell[0] - row) ** 2 + (cell[1] - col) ** 2 <= radius ** 2:
+                        entities.extend([cell] * self._counts[cell])
+        return entities
+
+
+def flat_distance_field(obstacles, height, width, sources):
+    """
+    Breadth-first search over a flat row-major grid
+
+    obstacles: bytearray with a non-zero byte for each full cell
+    sources: list of flat cell indices at distance zero
+
+    Returns an array of four-way distances from the nearest source,
+    height * width for cells that cannot be reached, with the 
+    typecode from distance_typecode
+    """
+    
+    area = height * width
+    distances = array(distance_typecode(area), [area]) * area
+    # obstacles start out visited so they are never enqueued
+    visited = bytearray(obstacles)
+    
+    # every cell is enqueued at most once, so a preallocated buffer
+    # with head and tail indices never has to wrap around
+    queue = array("i", [0]) * (area + len(sources))
+    tail = 0
+    for cell in sources:
+        visited[cell] = 1
+        distances[cell] = 0
+        queue[tail] = cell
+        tail += 1
+    
+    last_row = area - width
+    head = 0
+    while head < tail:
+        cell = queue[head]
+        head += 1
+        new_distance = distances[cell] + 1
+        col = cell % width
+        
+        # up, down, left and right neighbors that are on the grid
+        if cell >= width and not visited[cell - width]:
+            visited[cell - width] = 1
+            distances[cell - width] = new_distance
+            queue[tail] = cell - width
+            tail += 1
+        if cell < last_row and not visited[cell + width]:
+            visited[cell + width] = 1
+            distances[cell + width] = new_distance
+            queue[tail] = cell + width
+            tail += 1
+        if col > 0 and not visited[cell - 1]:
+            visited[cell - 1] = 1
+            distances[cell - 1] = new_distance
+            queue[tail] = cell - 1
+            tail += 1
+        if col < width - 1 and not visited[cell + 1]:
+            visited[cell + 1] = 1
+            distances[cell + 1] = new_distance
+            queue[tail] = cell + 1
+            tail += 1
+            
+    return distances
+
+
+def parallel_distance_field(obstacles, height, width, sources, processes):
+    """
+    Same as flat_distance_field, but split into strips of rows that
+    are searched by separate processes.  The search is frontier
+    synchronous: at each level every process expands its own cells
+    at that distance, and cells found across a strip boundary are
+    passed to the process that owns them for the next level.
+    """
+
+    area = height * width
+    typecode = distance_typecode(area)
+    # each process writes its strip here once it is done
+    shared = multiprocessing.RawArray(typecode, area)
+
+    processes = max(1, min(processes, height))
+    bounds = [height * strip // processes * width for strip in range(processes + 1)]
+    connections = []
+    workers = []
+    for strip in range(processes):
+        connection, worker_connection = multiprocessing.Pipe()
+        worker = multiprocessing.Process(target = _strip_search,
+                                         args = (worker_connection, obstacles,
+                                                 width, area, bounds[strip],
+                                                 bounds[strip + 1], shared))
+        worker.start()
+        connections.append(connection)
+        workers.append(worker)
+
+    # cells reached at the current level, by the strip that owns them
+    incoming = [[] for dummy_strip in range(processes)]
+    for cell in sources:
+        incoming[bisect.bisect_right(bounds, cell) - 1].append(cell)
+
+    searching = True
+    while searching:
+        for strip in range(processes):
+            connections[strip].send(incoming[strip])
+        incoming = [[] for dummy_strip in range(processes)]
+        searching = False
+        for strip in range(processes):
+            above, below, frontier_size = connections[strip].recv()
+            if strip > 0:
+                incoming[strip - 1].extend(above)
+            if strip < processes - 1:
+                incoming[strip + 1].extend(below)
+            if above or below or frontier_size:
+                searching = True
+
+    for strip in range(processes):
+        connections[strip].send(None)
+    for strip in range(processes):
+        connections[strip].recv()
+        workers[strip].join()
+
+    distances = array(typecode)
+    distances.fromstring(buffer(shared))
+    return distances
+
+
+def _strip_search(connection, obstacles, width, area, start, end, shared):
+    """
+    Search the cells from start to end for parallel_distance_field,
+    one level for each list of cells received on connection, until
+    None is received
+    """
+
+    typecode = distance_typecode(area)
+    distances = array(typecode, [area]) * (end - start)
+    visited = bytearray(buffer(obstacles, start, end - start))
+
+    level = 0
+    frontier = []
+    last_row = end - start - width
+    while True:
+        # cells found by the neighboring strips, all at this level
+        incoming = connection.recv()
+        if incoming == None:
+            break
+        for cell in incoming:
+            cell -= start
+            # sources are at distance zero even when full
+            if level == 0 or not visited[cell]:
+                visited[cell] = 1
+                distances[cell] = level
+                frontier.append(cell)
+
+        new_distance = level + 1
+        next_frontier = []
+        above = []
+        below = []
+        for cell in frontier:
+            col = cell % width
+            if cell >= width:
+                if not visited[cell - width]:
+                    visited[cell - width] = 1
+                    distances[cell - width] = new_distance
+                    next_frontier.append(cell - width)
+            elif start > 0:
+                above.append(start + cell - width)
+            if cell < last_row:
+                if not visited[cell + width]:
+                    visited[cell + width] = 1
+                    distances[cell + width] = new_distance
+                    next_frontier.append(cell + width)
+            elif end < area:
+                below.append(start + cell + width)
+            if col > 0 and not visited[cell - 1]:
+                visited[cell - 1] = 1
+                distances[cell - 1] = new_distance
+                next_frontier.append(cell - 1)
+            if col < width - 1 and not visited[cell + 1]:
+                visited[cell + 1] = 1
+                distances[cell + 1] = new_distance
+                next_frontier.append(cell + 1)
+
+        connection.send((above, below, len(next_frontier)))
+        frontier = next_frontier
+        level = new_distance
+
+    ctypes.memmove(ctypes.addressof(shared) + start * distances.itemsize,
+                   distances.buffer_info()[0], len(distances) * distances.itemsize)
+    connection.send(True)
+
+
+def distance_typecode(area):
+    """
+    Return the array typecode of the smallest integer that holds 
+    every distance on a grid of the given area, up to area itself
+    """
+    if area <= 0xFFFF:
+        return "H"
+    return "i"
+
+
+def flat_four_neighbors(cell, height, width):
+    """
+    Return a list of the flat indices of the four-way neighbors of
+    a cell on a row-major grid
+    """
+    
+    neighbors = []
+    if cell >= width:
+        neighbors.append(cell - width)
+    if cell < (height - 1) * width:
+        neighbors.append(cell + width)
+    if cell % width > 0:
+        neighbors.append(cell - 1)
+    if cell % width < width - 1:
+        neighbors.append(cell + 1)
+    return neighbors
+
+
+def repair_distance_field(distances, obstacles, height, width, 
+                          old_sources, new_sources, changed_cells):
+    """
+    Repair in place a flat distance field from flat_distance_field
+    after its sources changed from the set old_sources to the set
+    new_sources and the cells in changed_cells were set full or 
+    empty, giving the same field as a new search.  Only the cells
+    whose distance changes (and their neighbors) are visited.
+    """
+    
+    area = height * width
+    
+    def blocked(cell):
+        """
+        Obstacles block paths unless they hold a source
+        """
+        return obstacles[cell] and cell not in new_sources
+    
+    # first find every cell whose shortest path ran through a removed
+    # source or a new obstacle, level by level so that the cells at
+    # one distance are all known before their neighbors one further
+    invalid = set()
+    buckets = {}
+    for cell in old_sources - new_sources:
+        invalid.add(cell)
+        buckets.setdefault(distances[cell], []).append(cell)
+    for cell in changed_cells:
+        if blocked(cell) and distances[cell] < area and cell not in invalid:
+            invalid.add(cell)
+            buckets.setdefault(distances[cell], []).append(cell)
+    
+    for level, cell in bucket_order(buckets):
+        for child in flat_four_neighbors(cell, height, width):
+            if (distances[child] != level + 1 or child in invalid 
+                    or child in new_sources):
+                continue
+            # the child keeps its distance if another parent remains
+            supported = False
+            for parent in flat_four_neighbors(child, height, width):
+                if (distances[parent] == level and parent not in invalid 
+                        and not blocked(parent)):
+                    supported = True
+                    break
+            if not supported:
+                invalid.add(child)
+                buckets.setdefault(level + 1, []).append(child)
+    
+    for cell in invalid:
+        distances[cell] = area
+        
+    def neighbor_distance(cell):
+        """
+        Shortest distance to cell through one of its neighbors
+        """
+        best = area
+        for neighbor in flat_four_neighbors(cell, height, width):
+            if distances[neighbor] + 1 < best and not blocked(neighbor):
+                best = distances[neighbor] + 1
+        return best
+    
+    # then lower distances again from the edges of the invalid cells,
+    # new sources and newly empty cells
+    for cell in invalid:
+        if not blocked(cell):
+            distances[cell] = neighbor_distance(cell)
+            if distances[cell] < area:
+                buckets.setdefault(distances[cell], []).append(cell)
+    for cell in new_sources - old_sources:
+        distances[cell] = 0
+        buckets.setdefault(0, []).append(cell)
+    for cell in changed_cells:
+        if not blocked(cell) and cell not in invalid:
+            best = neighbor_distance(cell)
+            if best < distances[cell]:
+                distances[cell] = best
+                buckets.setdefault(best, []).append(cell)
+    
+    for level, cell in bucket_order(buckets):
+        if distances[cell] != level:
+            continue
+        for neighbor in flat_four_neighbors(cell, height, width):
+            if level + 1 < distances[neighbor] and not blocked(neighbor):
+                distances[neighbor] = level + 1
+                buckets.setdefault(level + 1, []).append(neighbor)
+
+
+def bucket_order(buckets):
+    """
+    Generator that empties a dictionary of level -> list of cells
+    in increasing level order, including cells added to buckets 
+    at a higher level while it runs
+    """
+    
+    while buckets:
+        level = min(buckets)
+        while level in buckets:
+            for cell in buckets.pop(level):
+                yield level, cell
+            level += 1
+
+
+def random_apocalypse(grid_height, grid_width, obstacle_fraction = 0.2, 
+                      num_humans = 10, num_zombies = 10, seed = 0):
+    """
+    Create an Apocalypse with randomly placed obstacles, humans and
+    zombies, using seed for repeatable maps, without building a list
+    of cells
+    """
+    rand = random.Random(seed)
+    obstacle_grid = random_obstacles(grid_height * grid_width, obstacle_fraction, seed)
+    obstacles = (divmod(cell, grid_width) for cell in xrange(len(obstacle_grid))
+                 if obstacle_grid[cell] == FULL)
+    humans = [(rand.randrange(grid_height), rand.randrange(grid_width)) 
+              for dummy_idx in range(num_humans)]
+    zombies = [(rand.randrange(grid_height), rand.randrange(grid_width)) 
+               for dummy_idx in range(num_zombies)]
+    return Apocalypse(grid_height, grid_width, obstacles, zombies, humans)
+
+
+def run_distance_benchmark(sizes = [(30, 40), (100, 100), (300, 300), (1000, 1000)]):
+    """
+    Time compute_distance_field on random maps of each size
+    """
+    for grid_height, grid_width in sizes:
+        apocalypse = random_apocalypse(grid_height, grid_width)
+        start = time.time()
+        apocalypse.compute_distance_field(HUMAN)
+        elapsed = time.time() - start
+        print grid_height, "x", grid_width, ":", elapsed, "seconds,",
+        print grid_height * grid_width / elapsed, "cells/sec"
+
+def run_repair_benchmark(grid_height = 1000, grid_width = 1000, num_ticks = 10):
+    """
+    Time full and incremental distance fields over ticks that each
+    toggle one obstacle, or that each move one human one step
+    """
+    for change in ["Toggle obstacle", "Move human"]:
+        for incremental in [False, True]:
+            apocalypse = random_apocalypse(grid_height, grid_width, 
+                                           num_humans = 1000, seed = 1)
+            apocalypse.set_incremental(incremental)
+            apocalypse.compute_flat_distance_field(HUMAN)
+            rand = random.Random(2)
+            
+            start = time.time()
+            for dummy_tick in range(num_ticks):
+                if change == "Move human":
+                    humans = list(apocalypse.humans())
+                    row, col = humans[0]
+                    humans[0] = (row, (col + 1) % grid_width)
+                    apocalypse._move_entities(HUMAN, humans)
+                else:
+                    row = rand.randrange(grid_height)
+                    col = rand.randrange(grid_width)
+                    if apocalypse.is_empty(row, col):
+                        apocalypse.set_full(row, col)
+                    else:
+                        apocalypse.set_empty(row, col)
+                apocalypse.compute_flat_distance_field(HUMAN)
+            elapsed = (time.time() - start) / num_ticks
+            print change, "(incremental)" if incremental else "(full)", ":", 
+            print elapsed, "seconds per tick"
+
+def run_move_benchmark(grid_height = 1000, grid_width = 1000, 
+                       num_entities = 100000):
+    """
+    Compare entities per second of the loop and batched movement,
+    the batched movement reading the flat distance fields
+    """
+    apocalypse = random_apocalypse(grid_height, grid_width, num_humans = num_entities,
+                                   num_zombies = num_entities)
+    zombie_fields = [apocalypse.compute_distance_field(ZOMBIE), 
+                     apocalypse.compute_flat_distance_field(ZOMBIE)]
+    human_fields = [apocalypse.compute_distance_field(HUMAN),
+                    apocalypse.compute_flat_distance_field(HUMAN)]
+    humans = list(apocalypse.humans())
+    zombies = list(apocalypse.zombies())
+    
+    if numpy is None:
+        print "Batched movement: NumPy not available"
+        methods = [("loop", Apocalypse.move_humans, Apocalypse.move_zombies)]
+    else:
+        methods = [("loop", Apocalypse.move_humans, Apocalypse.move_zombies), 
+                   ("batch", Apocalypse.move_humans_batch, Apocalypse.move_zombies_batch)]
+    
+    global BATCH_MIN_ENTITIES
+    batch_min_entities = BATCH_MIN_ENTITIES
+    BATCH_MIN_ENTITIES = num_entities + 1
+    for method in range(len(methods)):
+        name, move_humans, move_zombies = methods[method]
+        apocalypse._move_entities(HUMAN, list(humans))
+        apocalypse._move_entities(ZOMBIE, list(zombies))
+        start = time.time()
+        move_humans(apocalypse, zombie_fields[method])
+        print "Humans (" + name + ") :", num_entities / (time.time() - start), 
+        print "entities/sec"
+        start = time.time()
+        move_zombies(apocalypse, human_fields[method])
+        print "Zombies (" + name + ") :", num_entities / (time.time() - start), 
+        print "entities/sec"
+    BATCH_MIN_ENTITIES = batch_min_entities
+
+def run_cache_benchmark(grid_height = 300, grid_width = 400, num_frames = 600,
+                        frames_per_move = 60):
+    """
+    Replay a GUI session that draws the human distance field every
+    frame and moves the humans and then the zombies every
+    frames_per_move frames, and report the distance field cache hits
+    and misses
+    """
+    apocalypse = random_apocalypse(grid_height, grid_width)
+    start = time.time()
+    for frame in range(1, num_frames + 1):
+        apocalypse.compute_distance_field(HUMAN)
+        if frame % frames_per_move == 0:
+            apocalypse.move_humans(apocalypse.compute_distance_field(ZOMBIE))
+            apocalypse.move_zombies(apocalypse.compute_distance_field(HUMAN))
+    elapsed = time.time() - start
+
+    stats = apocalypse.get_cache_stats()
+    print num_frames, "frames :", elapsed, "seconds,", stats["hits"], "hits,",
+    print stats["misses"], "misses"
+
+def run_index_benchmark(grid_height = 1000, grid_width = 1000, 
+                        num_entities = 10000, num_queries = 100, radius = 10):
+    """
+    Compare linear scans of the entity lists with the spatial index
+    for finding captured humans and counting the humans near each
+    zombie
+    """
+    apocalypse = random_apocalypse(grid_height, grid_width, num_humans = num_entities,
+                                   num_zombies = num_entities)
+    humans = list(apocalypse.humans())
+    zombies = list(apocalypse.zombies())
+    
+    start = time.time()
+    captured = [human for human in humans if human in zombies]
+    print "Captured humans (scan) :", time.time() - start, "seconds"
+    start = time.time()
+    assert apocalypse.captured_humans() == captured
+    print "Captured humans (index) :", time.time() - start, "seconds"
+    
+    start = time.time()
+    scan_counts = [len([human for human in humans 
+                        if (human[0] - row) ** 2 + (human[1] - col) ** 2 <= radius ** 2])
+                   for row, col in zombies[:num_queries]]
+    print "Humans within", radius, "(scan) :", 
+    print (time.time() - start) / num_queries, "seconds per query"
+    start = time.time()
+    index_counts = [len(apocalypse.humans_within(row, col, radius)) 
+                    for row, col in zombies[:num_queries]]
+    print "Humans within", radius, "(index) :", 
+    print (time.time() - start) / num_queries, "seconds per query"
+    assert index_counts == scan_counts
+
+def run_parallel_benchmark(sizes = [(4000, 4000), (10000, 10000)],
+                           process_counts = [1, 2, 4, 8]):
+    """
+    Report the speedup over flat_distance_field of the parallel
+    distance field on random compact maps for each process count,
+    checking that the fields are identical
+    """
+    print "Cores:", multiprocessing.cpu_count()
+    for grid_height, grid_width in sizes:
+        area = grid_height * grid_width
+        obstacles = (ctypes.c_ubyte * area).from_buffer(random_obstacles(area))
+        rand = random.Random(1)
+        sources = set([rand.randrange(area) for dummy_idx in range(10)])
+
+        start = time.time()
+        serial = flat_distance_field(obstacles, grid_height, grid_width, sources)
+        serial_time = time.time() - start
+        print grid_height, "x", grid_width, ": serial", serial_time, "seconds"
+
+        for processes in process_counts:
+            start = time.time()
+            parallel = parallel_distance_field(obstacles, grid_height, grid_width,
+                                               sources, processes)
+            elapsed = time.time() - start
+            print " ", processes, "processes :", elapsed, "seconds, speedup",
+            print serial_time / elapsed, "identical" if parallel == serial else "DIFFERENT"
+        del serial, parallel
+
+# Headless simulation
+
+# per-tick phases timed by run_headless, in the order they run
+PHASES = ["bfs_zombies", "move_humans", "bfs_humans", "move_zombies"]
+
+def save_map(apocalypse, filename):
+    """
+    Write the obstacles, humans and zombies of an Apocalypse to a 
+    text map file: a "height width" line, one line per grid row 
+    with "#" for obstacles and "." for empty cells, then a "humans"
+    and a "zombies" line each followed by one "row col" line per
+    entity
+    """
+    height = apocalypse.get_grid_height()
+    width = apocalypse.get_grid_width()
+    
+    lines = [str(height) + " " + str(width)]
+    for row in range(height):
+        lines.append("".join(["." if apocalypse.is_empty(row, col) else "#" 
+                              for col in range(width)]))
+    lines.append("humans")
+    lines.extend([str(row) + " " + str(col) for row, col in apocalypse.humans()])
+    lines.append("zombies")
+    lines.extend([str(row) + " " + str(col) for row, col in apocalypse.zombies()])
+    
+    with open(filename, "w") as map_file:
+        map_file.write("\n".join(lines) + "\n")
+
+
+def load_map(filename):
+    """
+    Create an Apocalypse from a text map file written by save_map
+    """
+    with open(filename) as map_file:
+        lines = map_file.read().splitlines()
+    
+    height, width = [int(size) for size in lines[0].split()]
+    obstacles = [(row, col) for row in range(height) for col in range(width)
+                 if lines[row + 1][col] == "#"]
+    
+    humans_line = height + 1
+    zombies_line = lines.index("zombies", humans_line)
+    humans = [tuple([int(index) for index in line.split()]) 
+              for line in lines[humans_line + 1: zombies_line]]
+    zombies = [tuple([int(index) for index in line.split()]) 
+               for line in lines[zombies_line + 1:] if line != ""]
+    
+    return Apocalypse(height, width, obstacles, zombies, humans)
+
+
+# Binary maps
+
+# magic, height, width, number of humans, number of zombies
+BINARY_MAP_HEADER = struct.Struct("=4sIIII")
+BINARY_MAP_MAGIC = "ZMAP"
+
+def write_binary_map(filename, height, width, obstacles, humans, zombies):
+    """
+    Write a binary map file: a BINARY_MAP_HEADER, then one byte per
+    cell in row-major order, non-zero for obstacles, then the humans
+    and zombies as (row, col) pairs of native unsigned ints
+    """
+    with open(filename, "wb") as map_file:
+        map_file.write(BINARY_MAP_HEADER.pack(BINARY_MAP_MAGIC, height, width,
+                                              len(humans), len(zombies)))
+        map_file.write(obstacles)
+        for entity_list in [humans, zombies]:
+            positions = array("I")
+            for row, col in entity_list:
+                positions.append(row)
+                positions.append(col)
+            positions.tofile(map_file)
+
+
+def save_binary_map(apocalypse, filename):
+    """
+    Write the obstacles, humans and zombies of an Apocalypse to a
+    binary map file
+    """
+    write_binary_map(filename, apocalypse.get_grid_height(),
+                     apocalypse.get_grid_width(), apocalypse._obstacles,
+                     list(apocalypse.humans()), list(apocalypse.zombies()))
+
+
+def load_binary_map(filename):
+    """
+    Create a CompactApocalypse from a binary map file, with the
+    obstacle grid memory-mapped copy-on-write: cells are only read
+    from disk when used, and changes are never written back
+    """
+    with open(filename, "rb") as map_file:
+        # the mapping stays open after the file is closed
+        map_data = mmap.mmap(map_file.fileno(), 0, access = mmap.ACCESS_COPY)
+
+    magic, height, width, num_humans, num_zombies = \
+        BINARY_MAP_HEADER.unpack_from(map_data)
+    if magic != BINARY_MAP_MAGIC:
+        raise ValueError("not a binary map file: " + filename)
+
+    area = height * width
+    # the array keeps a reference to the mapping
+    obstacles = (ctypes.c_ubyte * area).from_buffer(map_data, BINARY_MAP_HEADER.size)
+
+    entity_lists = []
+    offset = BINARY_MAP_HEADER.size + area
+    for num_entities in [num_humans, num_zombies]:
+        positions = array("I")
+        positions.fromstring(map_data[offset: offset + 2 * num_entities * positions.itemsize])
+        offset += 2 * num_entities * positions.itemsize
+        entity_lists.append(zip(positions[0::2], positions[1::2]))
+
+    return CompactApocalypse(height, width, None, entity_lists[1], entity_lists[0],
+                             obstacles)
+
+
+def random_obstacles(area, obstacle_fraction = 0.2, seed = 0):
+    """
+    Return a bytearray of area cells, each full with probability
+    obstacle_fraction, without building a list of cells
+    """
+    rand = random.Random(seed)
+    # random bytes below the threshold become obstacles
+    threshold = int(round(obstacle_fraction * 256))
+    table = "".join([chr(FULL) if byte < threshold else chr(EMPTY)
+                     for byte in range(256)])
+    hex_digits = "%0*x" % (2 * area, rand.getrandbits(8 * area))
+    return bytearray(hex_digits.decode("hex").translate(table))
+
+
+def measure_peak_rss(function, args):
+    """
+    Call function(*args) in a new process and return its peak
+    resident set size in kilobytes, or None when the resource
+    module is not available
+    """
+    if resource == None:
+        return None
+
+    def child(connection):
+        """
+        Run the function and send back the peak RSS
+        """
+        function(*args)
+        connection.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+    receiver, sender = multiprocessing.Pipe(False)
+    process = multiprocessing.Process(target = child, args = (sender,))
+    process.start()
+    peak_rss = receiver.recv()
+    process.join()
+    return peak_rss
+
+
+def _list_backend_field(filename):
+    """
+    Load a binary map into a list-based Apocalypse and compute the
+    list distance field of its humans
+    """
+    compact = load_binary_map(filename)
+    height = compact.get_grid_height()
+    width = compact.get_grid_width()
+    obstacles = [(cell // width, cell % width) for cell in xrange(height * width)
+                 if compact._obstacles[cell]]
+    apocalypse = Apocalypse(height, width, obstacles,
+                            list(compact.zombies()), list(compact.humans()))
+    del compact, obstacles
+    apocalypse.compute_distance_field(HUMAN)
+
+
+def _compact_backend_field(filename):
+    """
+    Load a binary map into a CompactApocalypse and compute the flat
+    distance field of its humans
+    """
+    load_binary_map(filename).compute_flat_distance_field(HUMAN)
+
+
+def run_memory_benchmark(sizes = [(300, 300), (1000, 1000), (3000, 3000)],
+                         filename = "apocalypse_benchmark.map"):
+    """
+    Report the peak RSS above an idle process of loading a random
+    binary map and computing the distance field of its humans with
+    the list-based and the compact backends, and the load times
+    """
+    for grid_height, grid_width in sizes:
+        area = grid_height * grid_width
+        rand = random.Random(1)
+        humans = [(rand.randrange(grid_height), rand.randrange(grid_width))
+                  for dummy_idx in range(10)]
+        write_binary_map(filename, grid_height, grid_width, random_obstacles(area),
+                         humans, [])
+
+        start = time.time()
+        load_binary_map(filename)
+        print grid_height, "x", grid_width, ": load", time.time() - start, "seconds"
+
+        idle_rss = measure_peak_rss(len, ([],))
+        if idle_rss == None:
+            print "Peak RSS: resource module not available"
+            break
+        for name, backend in [("lists", _list_backend_field),
+                              ("compact", _compact_backend_field)]:
+            peak_rss = measure_peak_rss(backend, (filename,)) - idle_rss
+            print " ", name, ":", peak_rss, "KB peak RSS,",
+            print 1024.0 * peak_rss / area, "bytes/cell"
+
+    if os.path.exists(filename):
+        os.remove(filename)
+
+
+def run_headless(apocalypse, num_ticks, snapshot_every = 0, 
+                 snapshot_prefix = "apocalypse_tick_"):
+    """
+    Run num_ticks ticks of the simulation without the GUI.  Each 
+    tick moves the humans away from the zombies and then the zombies
+    towards the humans, as the GUI buttons do.
+
+    Every snapshot_every ticks (never if 0) the map is saved to
+    snapshot_prefix followed by the tick number.
+
+    Returns a dictionary of the total seconds spent in each of
+    PHASES, plus "ticks_per_sec"
+    """
+    timings = dict([(phase, 0.0) for phase in PHASES])
+    # batched movement reads the flat fields directly
+    batch = numpy is not None
+    
+    start = time.time()
+    for tick in range(1, num_ticks + 1):
+        phase_start = time.time()
+        if batch:
+            zombie_field = apocalypse.compute_flat_distance_field(ZOMBIE)
+        else:
+            zombie_field = apocalypse.compute_distance_field(ZOMBIE)
+        timings["bfs_zombies"] += time.time() - phase_start
+        
+        phase_start = time.time()
+        if batch:
+            apocalypse.move_humans_batch(zombie_field)
+        else:
+            apocalypse.move_humans(zombie_field)
+        timings["move_humans"] += time.time() - phase_start
+        
+        phase_start = time.time()
+        if batch:
+            human_field = apocalypse.compute_flat_distance_field(HUMAN)
+        else:
+            human_field = apocalypse.compute_distance_field(HUMAN)
+        timings["bfs_humans"] += time.time() - phase_start
+        
+        phase_start = time.time()
+        if batch:
+            apocalypse.move_zombies_batch(human_field)
+        else:
+            apocalypse.move_zombies(human_field)
+        timings["move_zombies"] += time.time() - phase_start
+        
+        if snapshot_every > 0 and tick % snapshot_every == 0:
+            save_map(apocalypse, snapshot_prefix + str(tick) + ".txt")
+            
+    timings["ticks_per_sec"] = num_ticks / (time.time() - start)
+    return timings
+
+
+def run_tick_benchmark(sizes = [(30, 40), (300, 400), (1000, 1000), (4000, 4000)], 
+                       num_ticks = 5):
+    """
+    Report per-phase timings and ticks per second of headless runs
+    on random maps of each size
+    """
+    for grid_height, grid_width in sizes:
+        num_entities = grid_height * grid_width // 100
+        apocalypse = random_apocalypse(grid_height, grid_width, 
+                                       num_humans = num_entities, 
+                                       num_zombies = num_entities)
+        timings = run_headless(apocalypse, num_ticks)
+        print grid_height, "x", grid_width, ":", timings["ticks_per_sec"], "ticks/sec"
+        for phase in PHASES:
+            print " ", phase, ":", timings[phase] / num_ticks, "seconds per tick"
+
+# run_distance_benchmark()
+# run_repair_benchmark()
+# run_move_benchmark()
+# run_cache_benchmark()
+# run_index_benchmark()
+# run_parallel_benchmark()
+# run_tick_benchmark()
+# run_memory_benchmark()
 
 # Start up gui for simulation - You will need to write some code above
 # before this will work without errors
 
-poc_zombie_gui.run_gui(Apocalypse(30, 40))
+if __name__ == "__main__":
+    poc_zombie_gui.run_gui(Apocalypse(30, 40))
@@ -12,10 +12,36 @@ http://www.codeskulptor.org/#user40_ODhJ8huYCA_9.py
 
 import urllib2
 import codeskulptor
+import heapq
+import itertools
+import bisect
+import tempfile
+import random
+import time
+import os
+import shutil
+import mmap
+import struct
+import ctypes
+from array import array
+import multiprocessing
 import poc_wrangler_provided as provided
 
+# resource is only used by the benchmarks
+try:
+    import resource
+except ImportError:
+    resource = None
+
 WORDFILE = "assets_scrabble_words3.txt"
 
+# runs this long are insertion sorted before merging bottom up
+MIN_RUN = 32
+# a run that wins this many times in a row starts galloping
+MIN_GALLOP = 7
+# intersect gallops when one list is this many times the other
+GALLOP_RATIO = 8
+
 codeskulptor.set_timeout(20)
 
 
@@ -69,6 +95,64 @@ def intersect(list1, list2):
     return intersection
 
 
+def intersect_galloping(list1, list2):
+    """
+    Compute the intersection of two sorted lists, the same as 
+    intersect.
+
+    When one list is much longer, each element of the shorter one
+    is found in the longer one with _gallop from the last match, 
+    so only about log(n / m) elements are compared per element.
+    """
+    
+    if len(list1) > len(list2):
+        shorter, longer = list2, list1
+    else:
+        shorter, longer = list1, list2
+    if len(shorter) * GALLOP_RATIO > len(longer):
+        return intersect(list1, list2)
+    
+    return list(intersect_iter(shorter, longer))
+
+
+def intersect_iter(elements, list2):
+    """
+    Generator that yields the elements of the sorted iterable 
+    elements that are also in the sorted list list2, as for 
+    intersect(list(elements), list2), galloping through list2.
+    """
+    
+    idx2 = 0
+    length = len(list2)
+    for element in elements:
+        idx2 = _gallop(list2, element, idx2, length, False)
+        if idx2 == length:
+            return
+        if list2[idx2] == element:
+            yield element
+            idx2 += 1
+
+
+def intersect_many(lists):
+    """
+    Compute the intersection of any number of sorted lists.
+
+    Returns a new sorted list, starting from the shortest list and
+    intersecting with the others from shortest to longest.
+    """
+    
+    lists = sorted(lists, key = len)
+    if lists == []:
+        return []
+    
+    intersection = list(lists[0])
+    for other in lists[1: ]:
+        if intersection == []:
+            break
+        intersection = intersect_galloping(intersection, other)
+    return intersection
+
+
 # Functions to perform merge sort
 
 def merge(list1, list2):
@@ -123,6 +207,115 @@ def merge_sort(list1):
     return new_list
 
 
+def merge_sort_bottom_up(list1):
+    """
+    Sort the elements of list1 without recursion.
+
+    Return a new sorted list with the same elements as list1, in
+    the same order as merge_sort for equal elements.
+
+    Runs of MIN_RUN elements are insertion sorted, then merged in
+    passes of doubling width between two lists of the same length.
+    """
+    
+    length = len(list1)
+    source = list(list1)
+    
+    for start in range(0, length, MIN_RUN):
+        end = min(start + MIN_RUN, length)
+        for idx in range(start + 1, end):
+            element = source[idx]
+            position = idx
+            # shift only greater elements so equal ones keep order
+            while position > start and source[position - 1] > element:
+                source[position] = source[position - 1]
+                position -= 1
+            source[position] = element
+    
+    target = [None] * length
+    width = MIN_RUN
+    while width < length:
+        for start in range(0, length, 2 * width):
+            midpoint = min(start + width, length)
+            end = min(start + 2 * width, length)
+            _gallop_merge(source, start, midpoint, end, target)
+        source, target = target, source
+        width *= 2
+    
+    return source
+
+
+def _gallop(items, key, start, end, after_equal):
+    """
+    Return the first index in the sorted items[start: end] of an
+    element greater than key if after_equal, else not less than 
+    key, probing 1, 2, 4, ... elements ahead before bisecting
+    """
+    
+    bound = start
+    step = 1
+    while bound < end and (items[bound] <= key if after_equal else items[bound] < key):
+        start = bound + 1
+        bound += step
+        step *= 2
+    bound = min(bound, end)
+    
+    if after_equal:
+        return bisect.bisect_right(items, key, start, bound)
+    return bisect.bisect_left(items, key, start, bound)
+
+
+def _gallop_merge(source, start, midpoint, end, target):
+    """
+    Merge the sorted source[start: midpoint] and source[midpoint: end]
+    into target[start: end], taking equal elements from the first
+    first.  After MIN_GALLOP elements in a row from one run, all of 
+    its elements before the other run's next one are found with
+    _gallop and copied at once.
+    """
+    
+    idx1 = start
+    idx2 = midpoint
+    out = start
+    
+    # already in order, as with presorted input
+    if idx2 == end or source[idx2 - 1] <= source[idx2]:
+        target[start: end] = source[start: end]
+        return
+    
+    wins1 = 0
+    wins2 = 0
+    while idx1 < midpoint and idx2 < end:
+        if wins1 >= MIN_GALLOP:
+            stop = _gallop(source, source[idx2], idx1, midpoint, True)
+            target[out: out + stop - idx1] = source[idx1: stop]
+            out += stop - idx1
+            idx1 = stop
+            wins1 = 0
+        elif wins2 >= MIN_GALLOP:
+            stop = _gallop(source, source[idx1], idx2, end, False)
+            target[out: out + stop - idx2] = source[idx2: stop]
+            out += stop - idx2
+            idx2 = stop
+            wins2 = 0
+        elif source[idx2] < source[idx1]:
+            target[out] = source[idx2]
+            idx2 += 1
+            out += 1
+            wins2 += 1
+            wins1 = 0
+        else:
+            target[out] = source[idx1]
+            idx1 += 1
+            out += 1
+            wins1 += 1
+            wins2 = 0
+    
+    target[out: out + midpoint - idx1] = source[idx1: midpoint]
+    out += midpoint - idx1
+    target[out: end] = source[idx2: end]
+
+
 # Function to generate all strings for the word wrangler game
 
 def gen_all_strings(word):
@@ -157,20 +350,501 @@ def gen_all_strings(word):
     return master_list
 
 
+# Streaming versions of the ordered word list functions, taking 
+# any iterables and yielding their results lazily
+
+# marks an exhausted iterator, never equal to an element
+_END = object()
+
+def iter_remove_duplicates(iterable):
+    """
+    Generator that yields the elements of a sorted iterable without
+    duplicates, comparing each only with the one before it
+    """
+    
+    previous = _END
+    for element in iterable:
+        if element != previous:
+            yield element
+            previous = element
+
+
+def iter_merge(iterable1, iterable2):
+    """
+    Generator that merges two sorted iterables, as merge does
+    """
+    
+    iter1 = iter(iterable1)
+    iter2 = iter(iterable2)
+    element1 = next(iter1, _END)
+    element2 = next(iter2, _END)
+    
+    while element1 is not _END and element2 is not _END:
+        if element1 <= element2:
+            yield element1
+            element1 = next(iter1, _END)
+        else:
+            yield element2
+            element2 = next(iter2, _END)
+    
+    if element1 is not _END:
+        yield element1
+        for element1 in iter1:
+            yield element1
+    elif element2 is not _END:
+        yield element2
+        for element2 in iter2:
+            yield element2
+
+
+def iter_intersect(iterable1, iterable2):
+    """
+    Generator that yields the elements in both of two sorted 
+    iterables, as intersect does
+    """
+    
+    iter1 = iter(iterable1)
+    iter2 = iter(iterable2)
+    element1 = next(iter1, _END)
+    element2 = next(iter2, _END)
+    
+    while element1 is not _END and element2 is not _END:
+        if element1 < element2:
+            element1 = next(iter1, _END)
+        elif element1 > element2:
+            element2 = next(iter2, _END)
+        else:
+            yield element1
+            element1 = next(iter1, _END)
+            element2 = next(iter2, _END)
+
+
+def iter_lines(filename):
+    """
+    Generator that yields the lines of a file without their line
+    endings
+    """
+    
+    with open(filename) as line_file:
+        for line in line_file:
+            yield line.rstrip("\n")
+
+
+# Dictionary-pruned string generation
+
+# key marking the end of a word in a trie node, never a letter
+TRIE_END = ""
+
+def build_trie(words):
+    """
+    Build a prefix trie of words as nested dictionaries of letter
+    -> child node, with TRIE_END in the nodes that end a word
+    """
+    
+    trie = {}
+    for word in words:
+        node = trie
+        for letter in word:
+            node = node.setdefault(letter, {})
+        node[TRIE_END] = True
+    return trie
+
+
+def gen_valid_strings(word, trie):
+    """
+    Generator that yields each distinct word in a trie that can be
+    composed from the letters in word, in sorted order, the same as
+    intersect(merge_sort(gen_all_strings(word)), words).
+
+    Strings are only extended while they are a prefix of a word,
+    and only one string per letter of word is kept at a time.
+    """
+    
+    counts = {}
+    for letter in word:
+        counts[letter] = counts.get(letter, 0) + 1
+    letters = sorted(counts)
+    
+    def extend(prefix, node):
+        """
+        Yield the words in node's subtrie that start with prefix,
+        using the letters still in counts
+        """
+        if TRIE_END in node:
+            yield prefix
+        # each distinct letter once, so no string is made twice
+        for letter in letters:
+            if counts[letter] > 0 and letter in node:
+                counts[letter] -= 1
+                for valid_string in extend(prefix + letter, node[letter]):
+                    yield valid_string
+                counts[letter] += 1
+    
+    return extend("", trie)
+
+
+# Anagram signature index to look up words by their letters
+
+def signature(word):
+    """
+    Return the letters of word in sorted order, the same for all
+    of its anagrams
+    """
+    
+    return "".join(sorted(word))
+
+
+def build_anagram_index(words):
+    """
+    Build an index of words by signature.
+
+    Returns a dictionary of signature -> sorted list of the distinct
+    words with that signature.
+    """
+    
+    index = {}
+    for word in words:
+        index.setdefault(signature(word), []).append(word)
+    for signature_words in index.values():
+        signature_words[:] = remove_duplicates(sorted(signature_words))
+    return index
+
+
+def sub_multisets(letters):
+    """
+    Generator that yields the signature of every distinct multiset
+    of the letters in letters, including the empty one
+    """
+    
+    counts = {}
+    for letter in letters:
+        counts[letter] = counts.get(letter, 0) + 1
+    distinct = sorted(counts)
+    
+    def choose(position, prefix):
+        """
+        Yield prefix extended by 0 or more copies of each of the
+        distinct letters from position on
+        """
+        if position == len(distinct):
+            yield prefix
+            return
+        letter = distinct[position]
+        for count in range(counts[letter] + 1):
+            for sub_signature in choose(position + 1, prefix + letter * count):
+                yield sub_signature
+    
+    return choose(0, "")
+
+
+def sub_anagrams(index, word):
+    """
+    Return the sorted list of the words in an anagram index that
+    can be made from some of the letters in word, the same as
+    intersecting the sorted strings of gen_all_strings(word)
+    with the words
+    """
+    
+    found = []
+    for sub_signature in sub_multisets(word):
+        found.extend(index.get(sub_signature, []))
+    return sorted(found)
+
+
+def save_anagram_index(index, filename):
+    """
+    Write an anagram index to filename, one line per signature with
+    the signature, a tab and its words separated by spaces
+    """
+    
+    with open(filename, "w") as index_file:
+        for sub_signature in sorted(index):
+            index_file.write(sub_signature + "\t" + " ".join(index[sub_signature]) + "\n")
+
+
+def load_anagram_index(filename):
+    """
+    Load an anagram index written by save_anagram_index
+    """
+    
+    index = {}
+    with open(filename) as index_file:
+        for line in index_file:
+            sub_signature, signature_words = line[:-1].split("\t")
+            index[sub_signature] = signature_words.split(" ")
+    return index
+
+
+# External sorting for word lists larger than memory
+
+def _spill_run(chunk, unique, temp_dir):
+    """
+    Sort a list of words in place and write it to a new temporary
+    file, one word per line, without duplicates if unique.
+
+    Returns the file, rewound to its start.
+    """
+    
+    chunk.sort()
+    run_file = tempfile.TemporaryFile(dir = temp_dir)
+    run_file.writelines(word + "\n" for word in merge_runs([chunk], unique))
+    run_file.seek(0)
+    return run_file
+
+
+def _read_run(run_file):
+    """
+    Generator that yields the words of a run file from _spill_run
+    """
+    
+    for line in run_file:
+        yield line[:-1]
+
+
+def merge_runs(runs, unique = True):
+    """
+    Generator that merges sorted iterables of words with a heap,
+    yielding each word once if unique.
+    """
+    
+    if unique:
+        return iter_remove_duplicates(heapq.merge(*runs))
+    return heapq.merge(*runs)
+
+
+def external_sort(words, chunk_size = 1000000, max_runs = 100, 
+                  unique = True, temp_dir = None):
+    """
+    Sort an iterable of words that may not fit in memory.
+
+    Words are read chunk_size at a time, each chunk is sorted and
+    spilled to a temporary file, and the sorted runs are merged
+    with a heap, dropping duplicates if unique.  Once max_runs runs
+    are spilled they are merged into one, so no more than max_runs
+    files are open at once.
+
+    Generator that yields the words in sorted order.
+    """
+    
+    runs = []
+    try:
+        chunk = []
+        for word in words:
+            chunk.append(word)
+            if len(chunk) == chunk_size:
+                runs.append(_spill_run(chunk, unique, temp_dir))
+                chunk = []
+            if len(runs) == max_runs:
+                run_file = tempfile.TemporaryFile(dir = temp_dir)
+                run_file.writelines(word + "\n" for word in 
+                                    merge_runs([_read_run(run) for run in runs], unique))
+                run_file.seek(0)
+                for run in runs:
+                    run.close()
+                runs = [run_file]
+        
+        # the last chunk is merged straight from memory
+        chunk.sort()
+        for word in merge_runs([_read_run(run) for run in runs] + [chunk], unique):
+            yield word
+    finally:
+        for run in runs:
+            run.close()
+
+
+def sort_word_file(input_filename, output_filename, chunk_size = 1000000,
+                   unique = True):
+    """
+    Write the lines of input_filename, sorted and without duplicates
+    if unique, to output_filename with external_sort.
+
+    Returns the number of words written.
+    """
+    
+    num_words = 0
+    with open(output_filename, "w") as output_file:
+        for word in external_sort(iter_lines(input_filename), chunk_size, 
+                                  unique = unique):
+            output_file.write(word + "\n")
+            num_words += 1
+    return num_words
+
+
 # Function to load words from a file
 
 def load_words(filename):
     """
     Load word list from the file named filename.
 
-    Returns a list of strings.
+    Returns a list of strings, or a WordStore (which works as a 
+    sorted list of strings) when there is a local copy of the file,
+    so the words are only fetched and parsed over the network
+    when there is not.
     """
     
+    if os.path.exists(filename):
+        return open_word_store(filename)
+    
     url = codeskulptor.file2url(filename)
     netfile = urllib2.urlopen(url)
     
     return [line[:-1] for line in netfile.readlines()]
 
+# Compact dictionary store, a sorted word list in one mapped file
+
+# magic and number of words, then number of words + 1 offsets into
+# the words, then the words back to back
+STORE_HEADER = struct.Struct("=4sI")
+STORE_MAGIC = "WSTR"
+
+def build_word_store(text_filename, store_filename, chunk_size = 1000000):
+    """
+    Write the words of a text file, one per line, to a store file
+    sorted and without duplicates, in bounded memory
+
+    Returns the number of words
+    """
+    
+    offsets = array("I", [0])
+    blob_file = tempfile.TemporaryFile()
+    try:
+        for word in external_sort(iter_lines(text_filename), chunk_size):
+            blob_file.write(word)
+            offsets.append(offsets[-1] + len(word))
+        
+        blob_file.seek(0)
+        with open(store_filename, "wb") as store_file:
+            store_file.write(STORE_HEADER.pack(STORE_MAGIC, len(offsets) - 1))
+            offsets.tofile(store_file)
+            shutil.copyfileobj(blob_file, store_file)
+    finally:
+        blob_file.close()
+    
+    return len(offsets) - 1
+
+
+class WordStore:
+    """
+    Sorted word list read from a memory-mapped store file, so only
+    the pages in use are loaded.  Works as a read-only sorted list
+    of strings, such as the second list of intersect.
+    """
+    
+    def __init__(self, store_filename):
+        """
+        Map the store file written by build_word_store
+        """
+        with open(store_filename, "rb") as store_file:
+            # the mapping stays open after the file is closed
+            self._data = mmap.mmap(store_file.fileno(), 0, access = mmap.ACCESS_COPY)
+        
+        magic, self._num_words = STORE_HEADER.unpack_from(self._data)
+        if magic != STORE_MAGIC:
+            raise ValueError("not a word store file: " + store_filename)
+        # the offsets stay in the mapping as well
+        self._offsets = (ctypes.c_uint32 * (self._num_words + 1)).from_buffer(
+            self._data, STORE_HEADER.size)
+        self._blob_start = STORE_HEADER.size + ctypes.sizeof(self._offsets)
+        
+    def __len__(self):
+        """
+        Return the number of words
+        """
+        return self._num_words
+    
+    def __getitem__(self, index):
+        """
+        Return the word at index in sorted order, or a list of them
+        for a slice
+        """
+        if isinstance(index, slice):
+            return [self[idx] for idx in xrange(*index.indices(self._num_words))]
+        if index < 0:
+            index += self._num_words
+        if not 0 <= index < self._num_words:
+            raise IndexError("word store index out of range")
+        start = self._blob_start + self._offsets[index]
+        return self._data[start: self._blob_start + self._offsets[index + 1]]
+    
+    def __contains__(self, word):
+        """
+        Return whether word is in the store, by binary search
+        """
+        index = self._bisect(word, len(word), False)
+        return index < self._num_words and self[index] == word
+    
+    def _bisect(self, key, length, after):
+        """
+        Return the first index whose word cut to length letters is 
+        greater than key if after, else not less than key
+        """
+        data = self._data
+        offsets = self._offsets
+        blob_start = self._blob_start
+        low = 0
+        high = self._num_words
+        while low < high:
+            middle = (low + high) // 2
+            start = blob_start + offsets[middle]
+            end = min(start + length, blob_start + offsets[middle + 1])
+            word = data[start: end]
+            if word < key or (after and word == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def prefix_range(self, prefix):
+        """
+        Return (start, stop) such that the words from index start up
+        to stop are the words that start with prefix
+        """
+        return (self._bisect(prefix, len(prefix), False), 
+                self._bisect(prefix, len(prefix), True))
+    
+    def words_with_prefix(self, prefix):
+        """
+        Return the sorted list of the words that start with prefix
+        """
+        start, stop = self.prefix_range(prefix)
+        return [self[index] for index in range(start, stop)]
+    
+    def views(self, start = 0, stop = None):
+        """
+        Generator that yields read-only buffers of the words from
+        index start up to stop, without copying them into strings
+        """
+        if stop == None:
+            stop = self._num_words
+        offsets = self._offsets
+        blob_start = self._blob_start
+        for index in xrange(start, stop):
+            yield buffer(self._data, blob_start + offsets[index], 
+                         offsets[index + 1] - offsets[index])
+    
+    def close(self):
+        """
+        Unmap the store file
+        """
+        del self._offsets
+        self._data.close()
+
+
+def open_word_store(text_filename, store_filename = None):
+    """
+    Return a WordStore of the words in a local text file, building
+    its store file (by default text_filename + ".store") first if it
+    is missing or older than the text file
+    """
+    
+    if store_filename == None:
+        store_filename = text_filename + ".store"
+    if (not os.path.exists(store_filename) or 
+            os.path.getmtime(store_filename) < os.path.getmtime(text_filename)):
+        build_word_store(text_filename, store_filename)
+    return WordStore(store_filename)
+
+
 def run():
     """
     Run game.
@@ -181,6 +855,308 @@ def run():
                                      gen_all_strings)
     provided.run_game(wrangler)
 
+def write_random_words(filename, num_words, seed = 0):
+    """
+    Write num_words random lowercase words of 2 to 8 letters to
+    filename, one per line
+    """
+    
+    rand = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    with open(filename, "w") as word_file:
+        for dummy_idx in xrange(num_words):
+            word = "".join([rand.choice(letters) for dummy_letter in 
+                            range(rand.randint(2, 8))])
+            word_file.write(word + "\n")
+
+
+def run_external_sort_benchmark(num_words = 100000000, chunk_size = 1000000,
+                                filename = "random_words.txt"):
+    """
+    Time sort_word_file on a file of num_words random words
+    """
+    
+    start = time.time()
+    write_random_words(filename, num_words)
+    print "Wrote", num_words, "words in", time.time() - start, "seconds"
+    
+    start = time.time()
+    num_unique = sort_word_file(filename, filename + ".sorted", chunk_size)
+    elapsed = time.time() - start
+    print "Sorted", num_words, "words into", num_unique, "unique words in", 
+    print elapsed, "seconds,", num_words / elapsed, "words/sec"
+    
+    os.remove(filename)
+    os.remove(filename + ".sorted")
+
+
+def random_words(num_words, seed = 0):
+    """
+    Return a list of num_words random lowercase words of 2 to 8
+    letters
+    """
+    
+    rand = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join([rand.choice(letters) for dummy_letter in range(rand.randint(2, 8))])
+            for dummy_idx in xrange(num_words)]
+
+
+def measure_peak_rss(function, args):
+    """
+    Call function(*args) in a new process and return its peak
+    resident set size in kilobytes, or None when the resource
+    module is not available
+    """
+    
+    if resource == None:
+        return None
+    
+    def child(connection):
+        """
+        Run the function and send back the peak RSS
+        """
+        function(*args)
+        connection.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    
+    receiver, sender = multiprocessing.Pipe(False)
+    process = multiprocessing.Process(target = child, args = (sender,))
+    process.start()
+    peak_rss = receiver.recv()
+    process.join()
+    return peak_rss
+
+
+def _sort_random_words(num_words, sort):
+    """
+    Sort num_words random words with sort, or only make them if
+    sort is None
+    """
+    
+    words = random_words(num_words)
+    if sort != None:
+        sort(words)
+
+
+def run_sort_benchmark(sizes = [10 ** 5, 10 ** 6, 10 ** 7]):
+    """
+    Compare the time and the peak memory above the unsorted words
+    of merge_sort and merge_sort_bottom_up on random words
+    """
+    
+    for num_words in sizes:
+        words = random_words(num_words)
+        base_rss = measure_peak_rss(_sort_random_words, (num_words, None))
+        for sort in [merge_sort, merge_sort_bottom_up]:
+            start = time.time()
+            sort(words)
+            elapsed = time.time() - start
+            print num_words, "words,", sort.__name__, ":", elapsed, "seconds,",
+            if base_rss == None:
+                print "peak memory not available"
+            else:
+                peak_rss = measure_peak_rss(_sort_random_words, (num_words, sort))
+                print peak_rss - base_rss, "KB peak memory"
+
+def run_anagram_benchmark(words = None, test_words = ["wrangle", "strategy", 
+                                                       "triangles"]):
+    """
+    Compare the time per round of finding the valid words with 
+    gen_all_strings, merge_sort and intersect, and with an anagram
+    index of the sorted word list words (by default the game's 
+    word file)
+    """
+    
+    if words == None:
+        words = load_words(WORDFILE)
+    
+    start = time.time()
+    index = build_anagram_index(words)
+    print "Built index of", len(words), "words in", time.time() - start, "seconds"
+    
+    for word in test_words:
+        start = time.time()
+        # intersect skips repeated strings itself
+        expected = intersect(merge_sort(gen_all_strings(word)), words)
+        pipeline_time = time.time() - start
+        start = time.time()
+        found = sub_anagrams(index, word)
+        index_time = time.time() - start
+        assert found == expected
+        print word, ":", len(found), "words,", pipeline_time, "seconds with",
+        print "gen_all_strings,", index_time, "seconds with the index"
+
+def run_trie_benchmark(words = None, test_words = ["wrangle", "strategy", "triangles",
+                                                    "algorithms", "wranglingly",
+                                                    "conversation"],
+                       max_pipeline_length = 9):
+    """
+    Compare the time of finding the valid words with gen_all_strings,
+    merge_sort and intersect (for words up to max_pipeline_length
+    letters) and with gen_valid_strings, using the sorted word list
+    words (by default the game's word file)
+    """
+    
+    if words == None:
+        words = load_words(WORDFILE)
+    
+    start = time.time()
+    trie = build_trie(words)
+    print "Built trie of", len(words), "words in", time.time() - start, "seconds"
+    
+    for word in test_words:
+        start = time.time()
+        found = list(gen_valid_strings(word, trie))
+        trie_time = time.time() - start
+        print word, ":", len(found), "words,", trie_time, "seconds with the trie"
+        if len(word) <= max_pipeline_length:
+            start = time.time()
+            expected = intersect(merge_sort(gen_all_strings(word)), words)
+            print word, ":", time.time() - start, "seconds with gen_all_strings"
+            assert found == expected
+
+def _load_word_list(text_filename):
+    """
+    Read a word list from a text file into a set for lookups
+    """
+    
+    words = [line[:-1] for line in open(text_filename)]
+    return set(words)
+
+
+def _look_up_words(load, filename, queries):
+    """
+    Load words from filename with load and look up each query
+    """
+    
+    words = load(filename)
+    for query in queries:
+        query in words
+
+
+def run_store_benchmark(text_filename = WORDFILE, num_queries = 10000):
+    """
+    Compare reading a local word file into a list and a set with
+    mapping its word store, for start time, lookups per second and
+    peak memory above an idle process
+    """
+    
+    store_filename = text_filename + ".store"
+    start = time.time()
+    num_words = build_word_store(text_filename, store_filename)
+    print "Built store of", num_words, "words in", time.time() - start, "seconds"
+    
+    rand = random.Random(0)
+    words = [line[:-1] for line in open(text_filename)]
+    queries = [rand.choice(words) for dummy_idx in range(num_queries // 2)]
+    queries += random_words(num_queries - len(queries))
+    del words
+    
+    idle_rss = measure_peak_rss(len, ([],))
+    for name, load, filename in [("list", _load_word_list, text_filename),
+                                 ("store", WordStore, store_filename)]:
+        start = time.time()
+        words = load(filename)
+        start_time = time.time() - start
+        # lookups are timed on their own, after loading
+        start = time.time()
+        for query in queries:
+            query in words
+        lookup_rate = num_queries / (time.time() - start)
+        del words
+        print name, ":", start_time, "seconds to start,", lookup_rate, "lookups/sec,",
+        if idle_rss == None:
+            print "peak memory not available"
+        else:
+            print measure_peak_rss(_look_up_words, (load, filename, queries)) - idle_rss, 
+            print "KB peak memory"
+    
+    os.remove(store_filename)
+
+def run_intersect_benchmark(words = None, ratios = [1, 4, 16, 256, 4096], 
+                            num_repeats = 5):
+    """
+    Compare intersect and intersect_galloping of the sorted word
+    list words (by default the game's word file) with random
+    sorted samples of it, for each size ratio
+    """
+    
+    if words == None:
+        words = load_words(WORDFILE)
+    rand = random.Random(0)
+    
+    for ratio in ratios:
+        sample = sorted(rand.sample(words, max(1, len(words) // ratio)))
+        for function in [intersect, intersect_galloping]:
+            start = time.time()
+            for dummy_repeat in range(num_repeats):
+                result = function(sample, words)
+            elapsed = (time.time() - start) / num_repeats
+            assert result == sample
+            print "1:" + str(ratio), function.__name__, ":", elapsed, "seconds"
+    
+    start = time.time()
+    intersect_many([words, words[::2], words[::3], words[::5]])
+    print "intersect_many of 4 lists :", time.time() - start, "seconds"
+
+def write_sorted_lines(filename, num_lines):
+    """
+    Write num_lines sorted lines to filename, each number from 0 
+    written twice as ten digits
+    """
+    
+    with open(filename, "w") as line_file:
+        for line in xrange(num_lines):
+            line_file.write("%010d\n" % (line // 2))
+
+
+def _count_stream(filename):
+    """
+    Count the distinct lines of a file that are multiples of 3 or 5
+    with a pipeline of streaming stages
+    """
+    
+    multiples = iter_remove_duplicates(iter_merge(("%010d" % number for number in 
+                                                   itertools.count(0, 3)),
+                                                  ("%010d" % number for number in 
+                                                   itertools.count(0, 5))))
+    count = 0
+    for dummy_line in iter_intersect(iter_remove_duplicates(iter_lines(filename)), 
+                                     multiples):
+        count += 1
+    return count
+
+
+def run_stream_benchmark(num_lines = 50000000, filename = "sorted_lines.txt"):
+    """
+    Time a pipeline of iter_lines, iter_remove_duplicates, iter_merge
+    and iter_intersect over a sorted file of num_lines lines, and its
+    peak memory above an idle process
+    """
+    
+    write_sorted_lines(filename, num_lines)
+    
+    start = time.time()
+    count = _count_stream(filename)
+    elapsed = time.time() - start
+    print num_lines, "lines :", count, "found in", elapsed, "seconds,",
+    print num_lines / elapsed, "lines/sec"
+    
+    idle_rss = measure_peak_rss(len, ([],))
+    if idle_rss != None:
+        print "Peak memory :", measure_peak_rss(_count_stream, (filename,)) - idle_rss, "KB"
+    
+    os.remove(filename)
+
+# run_external_sort_benchmark()
+# run_sort_benchmark()
+# run_anagram_benchmark()
+# run_trie_benchmark()
+# run_store_benchmark()
+# run_intersect_benchmark()
+# run_stream_benchmark()
+
 # Uncomment when you are ready to try the game
-run()
+if __name__ == "__main__":
+    run()
 
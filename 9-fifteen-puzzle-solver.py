@@ -10,8 +10,21 @@ CodeSkulptor source:
 http://www.codeskulptor.org/#user40_bZhtc0W2ny_40.py
 """
 
+import random
+import time
+import os
+import mmap
+import struct
+import ctypes
+from array import array
 import poc_fifteen_gui
 
+# disjoint tile groups of additive pattern databases for the 4x4
+# puzzle, each a block of the solved grid (a 7-8 split would need
+# a search over 8 billion states for the 8 tile group)
+PARTITIONS_4X4 = {"5-5-5": [[1, 2, 3, 6, 7], [4, 5, 8, 9, 12], [10, 11, 13, 14, 15]],
+                  "6-6-3": [[1, 2, 3, 5, 6, 7], [4, 8, 9, 12, 13, 14], [10, 11, 15]]}
+
 class Puzzle:
     """
     Class representation for the Fifteen puzzle
@@ -464,5 +477,549 @@ class Puzzle:
             
         return move_string
 
+    ###########################################################
+    # Optimal solver
+
+    def is_solvable(self):
+        """
+        Check whether the puzzle can be solved, which is when the
+        parity of its permutation matches the parity of the 0 tile's
+        distance from the upper left
+        Returns a boolean
+        """
+        
+        tiles = [self._grid[row][col] for row in range(self._height)
+                 for col in range(self._width)]
+        
+        # a cycle of length k is k - 1 swaps
+        swaps = 0
+        seen = [False] * len(tiles)
+        for start in range(len(tiles)):
+            length = 0
+            position = start
+            while not seen[position]:
+                seen[position] = True
+                position = tiles[position]
+                length += 1
+            swaps += max(length - 1, 0)
+        
+        zero_row, zero_col = self.current_position(0, 0)
+        return swaps % 2 == (zero_row + zero_col) % 2
+
+    def solve_optimal(self, heuristic = None, stats = None):
+        """
+        Generate a shortest solution string for a puzzle with IDA*,
+        using heuristic (by default a ConflictHeuristic) to estimate
+        the moves left.  If stats is a dictionary, the number of
+        nodes expanded and the seconds taken are stored in it as
+        "nodes" and "seconds".
+        Updates the puzzle and returns a move string
+        """
+        
+        assert self.is_solvable(), "puzzle cannot be solved"
+        if heuristic == None:
+            heuristic = ConflictHeuristic(self._height, self._width)
+        
+        start = time.time()
+        tiles = [self._grid[row][col] for row in range(self._height)
+                 for col in range(self._width)]
+        moves, nodes = ida_star(tiles, self._height, self._width, heuristic)
+        if stats != None:
+            stats["nodes"] = nodes
+            stats["seconds"] = time.time() - start
+        
+        self.update_puzzle(moves)
+        return moves
+
+
+def ida_star(tiles, height, width, heuristic):
+    """
+    Iterative deepening A* search for a shortest solution of a
+    solvable puzzle, given as a row-major list of tiles.
+
+    heuristic must never overestimate, and have an estimate(tiles)
+    method and a delta(tiles, zero, target) method giving the change
+    in estimate when the tile at target moves into the 0 tile at zero.
+
+    Returns a tuple of the move string and the number of nodes
+    expanded
+    """
+    
+    # (target, direction) for each move of the 0 tile from each cell
+    neighbors = []
+    for position in range(height * width):
+        row, col = divmod(position, width)
+        options = []
+        if col > 0:
+            options.append((position - 1, "l"))
+        if col < width - 1:
+            options.append((position + 1, "r"))
+        if row > 0:
+            options.append((position - width, "u"))
+        if row < height - 1:
+            options.append((position + width, "d"))
+        neighbors.append(options)
+    
+    goal = range(height * width)
+    delta = heuristic.delta
+    path = []
+    nodes = [0]
+    
+    def search(zero, previous, cost, estimate, bound):
+        """
+        Depth first search below the current tiles without going
+        over bound.  Returns True when solved, or else the smallest
+        cost + estimate over bound that was cut off.
+        """
+        if cost + estimate > bound:
+            return cost + estimate
+        if estimate == 0 and tiles == goal:
+            return True
+        nodes[0] += 1
+        
+        minimum = float("inf")
+        for target, direction in neighbors[zero]:
+            # never undo the last move
+            if target == previous:
+                continue
+            change = delta(tiles, zero, target)
+            tiles[zero] = tiles[target]
+            tiles[target] = 0
+            path.append(direction)
+            result = search(target, zero, cost + 1, estimate + change, bound)
+            if result is True:
+                return True
+            path.pop()
+            tiles[target] = tiles[zero]
+            tiles[zero] = 0
+            minimum = min(minimum, result)
+        return minimum
+    
+    zero = tiles.index(0)
+    estimate = heuristic.estimate(tiles)
+    bound = estimate
+    while True:
+        result = search(zero, -1, 0, estimate, bound)
+        if result is True:
+            return "".join(path), nodes[0]
+        bound = result
+
+
+class ConflictHeuristic:
+    """
+    Manhattan distance plus linear conflicts: for each row (column),
+    the tiles that belong in it but are out of order there must 
+    leave it and come back, two moves each beyond their Manhattan
+    distance.  Updated incrementally for each move.
+    """
+    
+    def __init__(self, height, width):
+        """
+        Precompute distances for a puzzle of the given size
+        """
+        self._height = height
+        self._width = width
+        area = height * width
+        # Manhattan distance of each tile from each position
+        self._distances = [[0] * area] + [
+            [abs(position // width - tile // width) + abs(position % width - tile % width)
+             for position in range(area)] for tile in range(1, area)]
+        # goal positions along a line -> its conflict moves
+        self._line_cache = {}
+    
+    def estimate(self, tiles):
+        """
+        Return the estimate for a row-major list of tiles
+        """
+        total = 0
+        for position in range(len(tiles)):
+            total += self._distances[tiles[position]][position]
+        for row in range(self._height):
+            total += self._row_conflicts(tiles, row)
+        for col in range(self._width):
+            total += self._col_conflicts(tiles, col)
+        return total
+    
+    def delta(self, tiles, zero, target):
+        """
+        Return the change in estimate when the tile at target moves
+        into the 0 tile at zero
+        """
+        tile = tiles[target]
+        change = self._distances[tile][zero] - self._distances[tile][target]
+        
+        # only the lines the tile leaves and enters can change
+        if zero // self._width == target // self._width:
+            lines = self._col_conflicts
+            first = zero % self._width
+            second = target % self._width
+        else:
+            lines = self._row_conflicts
+            first = zero // self._width
+            second = target // self._width
+        
+        change -= lines(tiles, first) + lines(tiles, second)
+        tiles[zero] = tile
+        tiles[target] = 0
+        change += lines(tiles, first) + lines(tiles, second)
+        tiles[target] = tile
+        tiles[zero] = 0
+        return change
+    
+    def _row_conflicts(self, tiles, row):
+        """
+        Return the linear conflict moves of a row
+        """
+        width = self._width
+        goals = tuple([tile % width for tile in tiles[row * width: (row + 1) * width]
+                       if tile != 0 and tile // width == row])
+        return self._line_conflicts(goals)
+    
+    def _col_conflicts(self, tiles, col):
+        """
+        Return the linear conflict moves of a column
+        """
+        width = self._width
+        goals = tuple([tile // width for tile in tiles[col::width]
+                       if tile != 0 and tile % width == col])
+        return self._line_conflicts(goals)
+    
+    def _line_conflicts(self, goals):
+        """
+        Return two moves for each tile that has to leave its line so
+        that the rest, with goal positions goals in their order along
+        the line, are in order
+        """
+        if goals not in self._line_cache:
+            # longest increasing subsequence stays in the line
+            longest = [1] * len(goals)
+            for idx in range(len(goals)):
+                for before in range(idx):
+                    if goals[before] < goals[idx]:
+                        longest[idx] = max(longest[idx], longest[before] + 1)
+            self._line_cache[goals] = 2 * (len(goals) - max(longest + [0]))
+        return self._line_cache[goals]
+
+
+# Additive pattern databases
+
+# magic, height, width and number of pattern tiles, followed by the
+# pattern tiles as bytes and then one byte per rank
+PATTERN_HEADER = struct.Struct("=4sBBB")
+PATTERN_MAGIC = "PDB1"
+
+def rank_positions(positions, area):
+    """
+    Return the rank of a list of distinct positions on a board of
+    area cells, a perfect hash from 0 up to the number of such
+    lists: each position is numbered among the positions not used
+    before it, and the numbers are read as mixed radix digits
+    """
+    
+    rank = 0
+    used = 0
+    for idx in range(len(positions)):
+        position = positions[idx]
+        smaller = bin(used & ((1 << position) - 1)).count("1")
+        rank = rank * (area - idx) + position - smaller
+        used |= 1 << position
+    return rank
+
+
+def unrank_positions(rank, area, num_positions):
+    """
+    Return the list of positions with the given rank, the inverse
+    of rank_positions
+    """
+    
+    digits = []
+    for idx in range(num_positions - 1, -1, -1):
+        rank, digit = divmod(rank, area - idx)
+        digits.append(digit)
+    digits.reverse()
+    
+    unused = range(area)
+    return [unused.pop(digit) for digit in digits]
+
+
+def num_ranks(area, num_positions):
+    """
+    Return the number of lists of num_positions distinct positions
+    on a board of area cells
+    """
+    
+    count = 1
+    for idx in range(num_positions):
+        count *= area - idx
+    return count
+
+
+def build_pattern_database(height, width, pattern):
+    """
+    Breadth-first search from the solved puzzle over the positions of
+    the pattern tiles and the 0 tile, the other tiles left out.
+    Only moves of pattern tiles count, so databases of disjoint 
+    patterns can be added.
+
+    Returns a bytearray of the fewest moves to solve the pattern
+    tiles from each rank of their positions
+    """
+    
+    area = height * width
+    num_tiles = len(pattern)
+    table = bytearray([255]) * num_ranks(area, num_tiles)
+    # one bit for each rank and 0 tile position
+    visited = bytearray((len(table) * area + 7) // 8)
+    
+    neighbors = []
+    for position in range(area):
+        row, col = divmod(position, width)
+        neighbors.append([row * width + col + offset for offset, valid in
+                          [(-1, col > 0), (1, col < width - 1), 
+                           (-width, row > 0), (width, row < height - 1)] if valid])
+    
+    # states are rank * area + 0 tile position; moving the 0 tile 
+    # through other tiles is free, so the states at one cost are
+    # finished before the next cost is started
+    level = array("l", [rank_positions(pattern, area) * area])
+    cost = 0
+    while len(level) > 0:
+        next_level = array("l")
+        while len(level) > 0:
+            state = level.pop()
+            if visited[state >> 3] & (1 << (state & 7)):
+                continue
+            visited[state >> 3] |= 1 << (state & 7)
+            rank, zero = divmod(state, area)
+            if table[rank] > cost:
+                table[rank] = cost
+            
+            positions = unrank_positions(rank, area, num_tiles)
+            for target in neighbors[zero]:
+                if target in positions:
+                    # the pattern tile at target moves into the 0 tile
+                    moved = list(positions)
+                    moved[positions.index(target)] = zero
+                    next_state = rank_positions(moved, area) * area + target
+                    if not visited[next_state >> 3] & (1 << (next_state & 7)):
+                        next_level.append(next_state)
+                else:
+                    next_state = rank * area + target
+                    if not visited[next_state >> 3] & (1 << (next_state & 7)):
+                        level.append(next_state)
+        level = next_level
+        cost += 1
+    
+    return table
+
+
+def save_pattern_database(filename, height, width, pattern, table):
+    """
+    Write a table from build_pattern_database to filename
+    """
+    
+    with open(filename, "wb") as table_file:
+        table_file.write(PATTERN_HEADER.pack(PATTERN_MAGIC, height, width, len(pattern)))
+        table_file.write(bytearray(pattern))
+        table_file.write(table)
+
+
+class PatternDatabase:
+    """
+    Pattern database read from a memory-mapped file written by
+    save_pattern_database, so processes using the same file share
+    one copy of the table
+    """
+    
+    def __init__(self, filename):
+        """
+        Map the pattern database file
+        """
+        with open(filename, "rb") as table_file:
+            # the mapping stays open after the file is closed
+            data = mmap.mmap(table_file.fileno(), 0, access = mmap.ACCESS_COPY)
+        
+        magic, height, width, num_tiles = PATTERN_HEADER.unpack_from(data)
+        if magic != PATTERN_MAGIC:
+            raise ValueError("not a pattern database file: " + filename)
+        self._area = height * width
+        start = PATTERN_HEADER.size
+        self._pattern = list(bytearray(data[start: start + num_tiles]))
+        # the table is read in place, never copied
+        self._table = (ctypes.c_ubyte * num_ranks(self._area, num_tiles)).from_buffer(
+            data, start + num_tiles)
+    
+    def get_pattern(self):
+        """
+        Return the list of pattern tiles
+        """
+        return list(self._pattern)
+    
+    def size(self):
+        """
+        Return the number of bytes in the table
+        """
+        return len(self._table)
+    
+    def lookup(self, tiles):
+        """
+        Return the fewest moves of the pattern tiles to solve them
+        in a row-major list of tiles
+        """
+        return self._table[rank_positions([tiles.index(tile) for tile in self._pattern],
+                                          self._area)]
+
+
+class PatternHeuristic:
+    """
+    Sum of pattern databases of disjoint tile groups, for ida_star
+    or any other search over Puzzle tiles
+    """
+    
+    def __init__(self, databases):
+        """
+        Combine a list of PatternDatabase objects
+        """
+        self._databases = databases
+        # the database of each pattern tile
+        self._owners = {}
+        for database in databases:
+            for tile in database.get_pattern():
+                self._owners[tile] = database
+    
+    def estimate(self, tiles):
+        """
+        Return the estimate for a row-major list of tiles
+        """
+        return sum([database.lookup(tiles) for database in self._databases])
+    
+    def delta(self, tiles, zero, target):
+        """
+        Return the change in estimate when the tile at target moves
+        into the 0 tile at zero
+        """
+        tile = tiles[target]
+        database = self._owners.get(tile)
+        if database == None:
+            return 0
+        
+        before = database.lookup(tiles)
+        tiles[zero] = tile
+        tiles[target] = 0
+        after = database.lookup(tiles)
+        tiles[target] = tile
+        tiles[zero] = 0
+        return after - before
+
+
+def build_pattern_heuristic(height, width, partition, prefix = "pdb_"):
+    """
+    Return a PatternHeuristic of the tile groups in partition, 
+    building and saving each database to prefix followed by its
+    tiles unless that file already exists
+    """
+    
+    databases = []
+    for pattern in partition:
+        filename = (prefix + str(height) + "x" + str(width) + "_" + 
+                    "-".join([str(tile) for tile in pattern]) + ".pdb")
+        if not os.path.exists(filename):
+            table = build_pattern_database(height, width, pattern)
+            save_pattern_database(filename, height, width, pattern, table)
+        databases.append(PatternDatabase(filename))
+    return PatternHeuristic(databases)
+
+
+def scrambled_puzzle(puzzle_height, puzzle_width, num_moves, seed = 0):
+    """
+    Return a Puzzle made by num_moves random moves of the 0 tile from
+    the solved position, never undoing the move before
+    """
+    
+    rand = random.Random(seed)
+    puzzle = Puzzle(puzzle_height, puzzle_width)
+    opposites = {"l": "r", "r": "l", "u": "d", "d": "u"}
+    previous = None
+    for dummy_move in range(num_moves):
+        zero_row, zero_col = puzzle.current_position(0, 0)
+        options = []
+        if zero_col > 0:
+            options.append("l")
+        if zero_col < puzzle_width - 1:
+            options.append("r")
+        if zero_row > 0:
+            options.append("u")
+        if zero_row < puzzle_height - 1:
+            options.append("d")
+        options = [direction for direction in options if direction != opposites.get(previous)]
+        previous = rand.choice(options)
+        puzzle.update_puzzle(previous)
+    return puzzle
+
+
+def run_optimal_benchmark(scramble_lengths = [20, 30, 40, 50], num_puzzles = 5):
+    """
+    Report solution length, nodes expanded, nodes per second and
+    time of solve_optimal on 4x4 puzzles scrambled by each number
+    of random moves
+    """
+    
+    for num_moves in scramble_lengths:
+        for seed in range(num_puzzles):
+            puzzle = scrambled_puzzle(4, 4, num_moves, seed)
+            stats = {}
+            moves = puzzle.solve_optimal(stats = stats)
+            assert puzzle.current_position(0, 0) == (0, 0) and puzzle.row0_invariant(0)
+            print num_moves, "move scramble", seed, ":", len(moves), "moves,",
+            print stats["nodes"], "nodes,", stats["nodes"] / max(stats["seconds"], 1e-9),
+            print "nodes/sec,", stats["seconds"], "seconds"
+
+def run_pattern_benchmark(partition_name = "5-5-5", scramble_lengths = [40, 50], 
+                          num_puzzles = 3, num_lookups = 100000, prefix = "pdb_"):
+    """
+    Report the build time and size of each database of a partition
+    in PARTITIONS_4X4, lookups per second, and the nodes and time
+    of solve_optimal with the databases and with ConflictHeuristic
+    on scrambled 4x4 puzzles
+    """
+    
+    for pattern in PARTITIONS_4X4[partition_name]:
+        filename = prefix + "4x4_" + "-".join([str(tile) for tile in pattern]) + ".pdb"
+        if os.path.exists(filename):
+            os.remove(filename)
+        start = time.time()
+        build_pattern_heuristic(4, 4, [pattern], prefix)
+        print "Pattern", pattern, ":", time.time() - start, "seconds to build,", 
+        print os.path.getsize(filename), "bytes"
+    
+    start = time.time()
+    heuristic = build_pattern_heuristic(4, 4, PARTITIONS_4X4[partition_name], prefix)
+    print "Loaded in", time.time() - start, "seconds"
+    
+    rand = random.Random(0)
+    boards = []
+    for dummy_idx in range(100):
+        tiles = range(16)
+        rand.shuffle(tiles)
+        boards.append(tiles)
+    start = time.time()
+    for idx in range(num_lookups):
+        heuristic.estimate(boards[idx % 100])
+    print num_lookups * len(PARTITIONS_4X4[partition_name]) / (time.time() - start), 
+    print "lookups/sec"
+    
+    for num_moves in scramble_lengths:
+        for seed in range(num_puzzles):
+            for name, puzzle_heuristic in [("pattern", heuristic), ("conflict", None)]:
+                puzzle = scrambled_puzzle(4, 4, num_moves, seed)
+                stats = {}
+                moves = puzzle.solve_optimal(puzzle_heuristic, stats)
+                print num_moves, "move scramble", seed, "(" + name + ") :", len(moves), 
+                print "moves,", stats["nodes"], "nodes,", stats["seconds"], "seconds"
+
+# run_optimal_benchmark()
+# run_pattern_benchmark()
+
 # Start interactive simulation
-poc_fifteen_gui.FifteenGUI(Puzzle(4, 4))
+if __name__ == "__main__":
+    poc_fifteen_gui.FifteenGUI(Puzzle(4, 4))